@@ -1,8 +1,20 @@
 __all__ = [
     "app",
+    "archive",
+    "asr",
     "audio",
+    "cache",
     "config",
+    "jobs",
     "openai_client",
+    "pipeline",
+    "policy",
+    "realtime",
+    "scheduler",
+    "session",
     "suggester",
+    "tokens",
+    "transcript",
+    "vad",
 ]
 
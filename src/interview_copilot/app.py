@@ -1,17 +1,14 @@
-import threading
 import queue
-import tempfile
 import traceback
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 import webbrowser
-import os
 
 from .config import load_config
-from .audio import record_to_wav_tempfile, StreamRecorder, RollingMic
-from .openai_client import make_client, transcribe_file, chat_complete
-from .suggester import build_system_prompt, build_user_prompt
+from .audio import CaptureEngine
+from .openai_client import make_client
 from .menubar import start_menubar
+from .session import CopilotSession
 
 
 class App(tk.Tk):
@@ -29,7 +26,12 @@ class App(tk.Tk):
         # State
         try:
             self.cfg = load_config()
-            self.client = make_client(self.cfg.openai_api_key)
+            self.client = make_client(
+                self.cfg.openai_api_key,
+                connect_timeout=self.cfg.api_connect_timeout,
+                read_timeout=self.cfg.api_read_timeout,
+                base_url=self.cfg.openai_base_url,
+            )
             self.config_loaded = True
         except Exception as e:
             self.config_loaded = False
@@ -45,23 +47,7 @@ class App(tk.Tk):
         self.seconds_var = tk.IntVar(value=10)
         self.status_var = tk.StringVar(value="Ready")
 
-        self._worker = None
-        self._q = queue.Queue()
-        self._stream_recorder: StreamRecorder | None = None
-        self._is_hold_recording = False
-        self._pressed_tokens = set()
-        self._ptt_required_tokens = set()
-        self._hotkeys_label = None
-        self._hold_label = None
-        self._question_label = None
-        self._rolling_mic: RollingMic | None = None
-        self._rolling_thread: threading.Thread | None = None
-        self._rolling_stop = threading.Event()
-        self._last_suggest_ts = 0.0
-        self._last_transcript_snippet = ""
-        self._input_devices = []
-        self._output_devices = []
-
+        self._init_state()
         self._build_ui()
 
         # Keybindings (window-focused)
@@ -71,6 +57,7 @@ class App(tk.Tk):
         self.after(100, self._poll_queue)
         # Start global hotkey listener if configured
         if self.config_loaded:
+            self.session.start()
             self._start_global_hotkeys()
             # Global hold listener can be unstable on latest macOS; gate with config
             if getattr(self.cfg, 'ptt_global_enabled', False):
@@ -83,6 +70,21 @@ class App(tk.Tk):
         # Graceful shutdown
         self.protocol("WM_DELETE_WINDOW", self._on_quit)
 
+    def _init_state(self):
+        """Window-side state; everything else lives on the session."""
+        self.session = CopilotSession(self.cfg, self.client, device=self._resolve_selected_device_index)
+        self._ptt_engine: CaptureEngine | None = None
+        self._ptt_start_pos = 0
+        self._ptt_press_pos = 0
+        self._is_hold_recording = False
+        self._pressed_tokens = set()
+        self._ptt_required_tokens = set()
+        self._hotkeys_label = None
+        self._hold_label = None
+        self._question_label = None
+        self._input_devices = []
+        self._output_devices = []
+
     def _build_ui(self):
         pad = {"padx": 8, "pady": 6}
 
@@ -127,6 +129,9 @@ class App(tk.Tk):
         self.rolling_btn.pack(side=tk.LEFT, **pad)
         self.question_only_var = tk.BooleanVar(value=getattr(self.cfg, "rolling_question_only", True))
         ttk.Checkbutton(top2, text="Questions only", variable=self.question_only_var).pack(side=tk.LEFT, **pad)
+        for var in (self.style_var, self.question_only_var):
+            var.trace_add("write", self._sync_session)
+        self._sync_session()
 
         status_f = ttk.Frame(self)
         status_f.pack(fill=tk.X)
@@ -147,6 +152,10 @@ class App(tk.Tk):
         ttk.Label(status_f, text="Question:").pack(side=tk.LEFT, padx=(18, 4))
         self._question_label = ttk.Label(status_f, text="idle", foreground="#888")
         self._question_label.pack(side=tk.LEFT)
+        # Input level while rolling (fed from the capture callback's meter)
+        self._level_bar = ttk.Progressbar(status_f, orient=tk.HORIZONTAL, mode='determinate', length=60, maximum=100)
+        self._level_bar.pack(side=tk.RIGHT, padx=8)
+        self._last_clipped = 0
 
         # Transcript box
         ttk.Label(self, text="Transcript:").pack(anchor=tk.W, **pad)
@@ -162,6 +171,7 @@ class App(tk.Tk):
         actions.pack(fill=tk.X)
         ttk.Button(actions, text="Copy All", command=self.copy_all).pack(side=tk.LEFT, **pad)
         ttk.Button(actions, text="Clear", command=self.clear_all).pack(side=tk.LEFT, **pad)
+        ttk.Button(actions, text="Re-run…", command=self._rerun_from_archive).pack(side=tk.LEFT, **pad)
 
         hint = ttk.Label(
             self,
@@ -172,6 +182,12 @@ class App(tk.Tk):
 
         # Load devices after UI init
         self.after(200, self._refresh_devices)
+        self.after(150, self._level_tick)
+
+    def _sync_session(self, *_):
+        """Copy the toolbar choices the session reads from its worker threads."""
+        self.session.style = self.style_var.get()
+        self.session.question_only = bool(self.question_only_var.get())
 
     def _open_help(self):
         webbrowser.open_new_tab("https://platform.openai.com/")
@@ -184,61 +200,81 @@ class App(tk.Tk):
         if not self.config_loaded:
             messagebox.showerror("Missing API key", "Please configure OPENAI_API_KEY in a .env file.")
             return
-        if self._worker and self._worker.is_alive():
-            return
         if seconds <= 0:
             seconds = max(1, self.cfg.capture_seconds)
 
+        try:
+            engine = self.session.interviewer_engine()
+        except Exception as e:
+            messagebox.showerror("InterviewCopilot", f"Microphone unavailable: {e}")
+            return
+        # The shared stream is already running: start from the pre-roll
+        # instead of waiting for a device to open
+        start = max(0, engine.position - int(self.cfg.ptt_preroll_seconds * engine.samplerate))
         self.capture_btn.state(["disabled"])  # disable during work
-        self.set_status(f"Recording {seconds}s... grant mic permission if prompted")
-        self._worker = threading.Thread(target=self._do_capture_and_suggest, args=(seconds,), daemon=True)
-        self._worker.start()
+        self.set_status(f"Recording {seconds}s...")
+        self.session.jobs.submit(lambda t: self.session.capture_and_suggest(t, engine, start, seconds), "capture")
+
+    def _rerun_from_archive(self):
+        """Re-run transcription and suggestions on an earlier stretch of the session."""
+        archive = self.session.archive
+        if not archive:
+            messagebox.showinfo("InterviewCopilot", "Session archive is off. Set ARCHIVE_ENABLED=true in .env.")
+            return
 
-    def _do_capture_and_suggest(self, seconds: int):
+        def clock(sec: float) -> str:
+            return f"{int(sec) // 60}:{int(sec) % 60:02d}"
+
+        def parse(text: str) -> float:
+            mins, _, secs = text.strip().rpartition(":")
+            return int(mins or 0) * 60 + float(secs)
+
+        now = archive.source.position / archive.samplerate
+        spec = simpledialog.askstring(
+            "Re-run from archive",
+            f"Session time range (m:ss-m:ss), now at {clock(now)}:",
+            initialvalue=f"{clock(max(0, now - 30))}-{clock(now)}",
+            parent=self,
+        )
+        if not spec:
+            return
         try:
-            wav_path = record_to_wav_tempfile(seconds=seconds, samplerate=self.cfg.sample_rate)
-            self._process_wav_for_suggestions(wav_path)
+            a, _, b = spec.partition("-")
+            data = archive.read_seconds(parse(a), parse(b))
         except Exception as e:
-            err = f"Error: {e}"
-            self._q.put(("error", err))
-        finally:
-            try:
-                if 'wav_path' in locals() and wav_path and os.path.exists(wav_path):
-                    os.unlink(wav_path)
-            except Exception:
-                pass
+            messagebox.showerror("InterviewCopilot", f"Bad range {spec!r}: {e}")
+            return
+        if data is None or len(data) < int(0.2 * self.cfg.sample_rate):
+            self.set_status("Nothing archived in that range")
+            return
 
-    def _process_wav_for_suggestions(self, wav_path: str):
-        self._q.put(("status", f"Transcribing ({self.cfg.transcribe_model})..."))
-        transcript = transcribe_file(self.client, wav_path, model=self.cfg.transcribe_model)
-        self._q.put(("transcript", transcript))
-
-        self._q.put(("status", f"Generating suggestions ({self.cfg.suggest_model})..."))
-        system = build_system_prompt(self.style_var.get())
-        user = build_user_prompt(transcript)
-        suggestions = chat_complete(
-            self.client,
-            model=self.cfg.suggest_model,
-            system_prompt=system,
-            user_prompt=user,
-            temperature=0.3,
-        )
-        self._q.put(("suggestions", suggestions or "(No suggestions returned)"))
-        self._q.put(("status", "Done"))
+        self.session.jobs.submit(lambda t: self.session.run_audio_job(t, data), "re-run")
 
     def _poll_queue(self):
         try:
             while True:
-                kind, payload = self._q.get_nowait()
+                kind, payload = self.session.events.get_nowait()
                 if kind == "status":
                     self.set_status(payload)
-                elif kind == "transcript":
+                elif kind in ("transcript", "partial"):
                     self.transcript_box.delete("1.0", tk.END)
                     self.transcript_box.insert(tk.END, payload)
+                elif kind == "suggest_begin":
+                    self.suggest_box.delete("1.0", tk.END)
+                elif kind == "suggest_delta":
+                    self.suggest_box.insert(tk.END, payload)
+                    self.suggest_box.see(tk.END)
                 elif kind == "suggestions":
                     self.suggest_box.delete("1.0", tk.END)
                     self.suggest_box.insert(tk.END, payload)
                     self.capture_btn.state(["!disabled"])  # re-enable
+                elif kind == "failed":
+                    # API failures are expected live; report without a modal
+                    self.capture_btn.state(["!disabled"])  # re-enable
+                    self.set_status(str(payload))
+                elif kind == "superseded":
+                    self.capture_btn.state(["!disabled"])  # re-enable
+                    self.set_status("Skipped: a newer request took its place")
                 elif kind == "question":
                     # payload is bool
                     self._set_question_badge(bool(payload))
@@ -248,7 +284,8 @@ class App(tk.Tk):
                     messagebox.showerror("InterviewCopilot", str(payload))
         except queue.Empty:
             pass
-        self.after(120, self._poll_queue)
+        # Short interval so streamed suggestions render smoothly
+        self.after(50, self._poll_queue)
 
     # Devices
     def _refresh_devices(self):
@@ -291,6 +328,8 @@ class App(tk.Tk):
     def clear_all(self):
         self.transcript_box.delete("1.0", tk.END)
         self.suggest_box.delete("1.0", tk.END)
+        if self.session.memory:
+            self.session.memory.clear()
         self.set_status("Cleared")
 
     # Rolling mode
@@ -327,96 +366,29 @@ class App(tk.Tk):
             messagebox.showerror("Missing API key", "Please configure OPENAI_API_KEY in a .env file.")
             self.rolling_var.set(False)
             return
-        if self._rolling_thread and self._rolling_thread.is_alive():
-            return
-        device = self._resolve_selected_device_index()
-        self._rolling_mic = RollingMic(
-            samplerate=self.cfg.sample_rate,
-            channels=1,
-            device=device,
-            buffer_seconds=max(self.cfg.rolling_window_seconds * 2, 12),
-        )
-        try:
-            self._rolling_mic.start()
-        except Exception as e:
-            self.set_status(f"Rolling start failed: {e}")
+        if not self.session.start_rolling():
             self.rolling_var.set(False)
-            self._rolling_mic = None
             return
-        self._rolling_stop.clear()
-        self._last_suggest_ts = 0.0
-        self._last_transcript_snippet = ""
-        self._rolling_thread = threading.Thread(target=self._rolling_loop, daemon=True)
-        self._rolling_thread.start()
-        self.set_status("Rolling ON")
+        self._last_clipped = self.session.rolling_mic.levels().clipped
 
     def _stop_rolling(self):
-        self._rolling_stop.set()
+        self.session.stop_rolling()
+
+    def _level_tick(self):
         try:
-            if self._rolling_mic:
-                self._rolling_mic.stop()
+            mic = self.session.rolling_mic
+            if mic:
+                lv = mic.levels()
+                self._level_bar['value'] = int(max(0.0, min(1.0, lv.rms * 8.0)) * 100)
+                if lv.clipped > self._last_clipped:
+                    self.set_status("Input clipping; lower the input gain")
+                self._last_clipped = lv.clipped
+            else:
+                self._level_bar['value'] = 0
         except Exception:
             pass
-        self._rolling_mic = None
-        self.set_status("Rolling OFF")
-
-    def _rolling_loop(self):
-        import time
-        step = max(1, self.cfg.rolling_step_seconds)
-        window = max(2, self.cfg.rolling_window_seconds)
-        min_gap = max(3, self.cfg.rolling_min_suggest_gap)
-        while not self._rolling_stop.is_set():
-            try:
-                path = self._rolling_mic.last_wav_tempfile(window) if self._rolling_mic else None
-                if path:
-                    transcript = transcribe_file(self.client, path, model=self.cfg.transcribe_model)
-                else:
-                    transcript = ""
-                if path:
-                    try: os.unlink(path)
-                    except Exception: pass
-
-                text = transcript.strip()
-                # Skip tiny chunks
-                if len(text.split()) < 4:
-                    self._q.put(("question", False))
-                    time.sleep(step)
-                    continue
-
-                # Heuristic: only trigger on questions if enabled
-                if self.question_only_var.get() and not self._looks_like_question(text):
-                    # Update transcript box but skip suggestions
-                    self._q.put(("transcript", text))
-                    self._q.put(("question", False))
-                    time.sleep(step)
-                    continue
-
-                now = time.time()
-                if now - self._last_suggest_ts < min_gap:
-                    # Still indicate question state when suppressed by cooldown
-                    self._q.put(("question", True))
-                    time.sleep(step)
-                    continue
-
-                if text and text != self._last_transcript_snippet:
-                    self._q.put(("transcript", text))
-                    self._q.put(("question", True))
-                    system = build_system_prompt(self.style_var.get())
-                    user = build_user_prompt(text)
-                    suggestions = chat_complete(
-                        self.client,
-                        model=self.cfg.suggest_model,
-                        system_prompt=system,
-                        user_prompt=user,
-                        temperature=0.3,
-                    )
-                    self._q.put(("suggestions", suggestions or "(No suggestions returned)"))
-                    self._last_transcript_snippet = text
-                    self._last_suggest_ts = now
-            except Exception as e:
-                self._q.put(("status", f"Rolling error: {e}"))
-            finally:
-                time.sleep(step)
+        finally:
+            self.after(150, self._level_tick)
 
     def _set_question_badge(self, is_question: bool):
         if not self._question_label:
@@ -426,49 +398,6 @@ class App(tk.Tk):
         else:
             self._question_label.config(text="idle", foreground="#888")
 
-    def _looks_like_question(self, text: str) -> bool:
-        try:
-            import re
-            t = text.strip()
-            if not t:
-                return False
-            # Direct question mark near end
-            if '?' in t[-200:]:
-                return True
-            # Take last sentence-ish
-            parts = re.split(r'[.!?]\s+', t)
-            last = parts[-1].strip().lower()
-            if not last:
-                return False
-            # Keywords and auxiliaries
-            wh = (
-                'what', 'why', 'how', 'when', 'where', 'who', 'whom', 'whose', 'which'
-            )
-            aux = (
-                'can', 'could', 'would', 'will', 'do', 'does', 'did', 'is', 'are', 'am',
-                'was', 'were', 'have', 'has', 'should', 'may', 'might'
-            )
-            phrases = (
-                'tell me about', 'walk me through', 'could you explain', 'please explain',
-                'what about', 'what is your', 'how would you', 'how do you', 'why did you'
-            )
-            words = last.split()
-            if not words:
-                return False
-            # Starts with WH or auxiliary → likely a question
-            if words[0] in wh or words[0] in aux:
-                return True
-            # Contains indicative phrases
-            for p in phrases:
-                if p in last:
-                    return True
-            # Ends with up‑speak keywords
-            if last.endswith((' right', ' correct', ' okay', ' ok')):
-                return True
-            return False
-        except Exception:
-            return False
-
     def _start_global_hotkeys(self):
         try:
             from pynput import keyboard
@@ -548,44 +477,14 @@ class App(tk.Tk):
             if self._is_hold_recording:
                 return
             if self._ptt_required_tokens and self._ptt_required_tokens.issubset(self._pressed_tokens):
-                # Start recording stream
-                try:
-                    self._stream_recorder = StreamRecorder(samplerate=self.cfg.sample_rate, channels=1)
-                    self._stream_recorder.start()
-                    self._is_hold_recording = True
-                    self._q.put(("status", f"Recording (hold)... {self.cfg.ptt_hold_combo}"))
-                except Exception as e:
-                    self._q.put(("error", f"PTT start failed: {e}"))
+                self._ptt_begin(self.cfg.ptt_hold_combo)
 
         def on_release(key):
             t = token_for(key)
             if t in self._pressed_tokens:
                 self._pressed_tokens.remove(t)
             if self._is_hold_recording and (not self._ptt_required_tokens.issubset(self._pressed_tokens)):
-                # Stop and process
-                self._is_hold_recording = False
-                rec = self._stream_recorder
-                self._stream_recorder = None
-                if rec:
-                    try:
-                        wav = rec.stop_and_save()
-                    except Exception as e:
-                        self._q.put(("error", f"PTT stop failed: {e}"))
-                        wav = None
-                    if wav:
-                        # Spawn worker to transcribe/process
-                        def worker(path=wav):
-                            try:
-                                self._process_wav_for_suggestions(path)
-                            finally:
-                                try:
-                                    if os.path.exists(path):
-                                        os.unlink(path)
-                                except Exception:
-                                    pass
-                        threading.Thread(target=worker, daemon=True).start()
-                    else:
-                        self._q.put(("status", "Hold too short; ignored"))
+                self._ptt_end()
 
         try:
             self._ptt_listener = keyboard.Listener(on_press=on_press, on_release=on_release)
@@ -593,6 +492,38 @@ class App(tk.Tk):
         except Exception as e:
             self.set_status(f"Hold listener failed: {e}")
 
+    def _ptt_begin(self, label: str):
+        """Mark the hold start on the shared stream, including the pre-roll."""
+        try:
+            engine = self.session.interviewer_engine()
+        except Exception as e:
+            self.session.events.put(("error", f"PTT start failed: {e}"))
+            return
+        self._ptt_engine = engine
+        self._ptt_press_pos = engine.position
+        self._ptt_start_pos = max(0, self._ptt_press_pos - int(self.cfg.ptt_preroll_seconds * engine.samplerate))
+        self._is_hold_recording = True
+        self.session.status(f"Recording (hold)... {label}")
+
+    def _ptt_end(self):
+        self._is_hold_recording = False
+        engine = self._ptt_engine
+        self._ptt_engine = None
+        if not engine:
+            return
+        end = engine.position
+        # Too short? ignore if held < 0.2s
+        if end - self._ptt_press_pos < int(0.2 * engine.samplerate):
+            self.session.status("Hold too short; ignored")
+            return
+        data = engine.audio_range(self._ptt_start_pos, end)
+        if data is None:
+            self.session.status("Hold too short; ignored")
+            return
+        data = data.copy()
+
+        self.session.jobs.submit(lambda t: self.session.run_audio_job(t, data), "push-to-talk")
+
     def _stop_ptt_hold_listener(self):
         try:
             if hasattr(self, "_ptt_listener") and self._ptt_listener:
@@ -617,39 +548,12 @@ class App(tk.Tk):
         def on_press(_evt=None):
             if self._is_hold_recording:
                 return
-            try:
-                self._stream_recorder = StreamRecorder(samplerate=self.cfg.sample_rate, channels=1)
-                self._stream_recorder.start()
-                self._is_hold_recording = True
-                self._q.put(("status", f"Recording (hold) ... {key}"))
-            except Exception as e:
-                self._q.put(("error", f"PTT start failed: {e}"))
+            self._ptt_begin(key)
 
         def on_release(_evt=None):
             if not self._is_hold_recording:
                 return
-            self._is_hold_recording = False
-            rec = self._stream_recorder
-            self._stream_recorder = None
-            if rec:
-                try:
-                    wav = rec.stop_and_save()
-                except Exception as e:
-                    self._q.put(("error", f"PTT stop failed: {e}"))
-                    wav = None
-                if wav:
-                    def worker(path=wav):
-                        try:
-                            self._process_wav_for_suggestions(path)
-                        finally:
-                            try:
-                                if os.path.exists(path):
-                                    os.unlink(path)
-                            except Exception:
-                                pass
-                    threading.Thread(target=worker, daemon=True).start()
-                else:
-                    self._q.put(("status", "Hold too short; ignored"))
+            self._ptt_end()
 
         # Bind to the toplevel so it works when window is focused
         try:
@@ -664,6 +568,7 @@ class App(tk.Tk):
                 self._hotkey_listener.stop()
             if hasattr(self, "_ptt_listener") and self._ptt_listener:
                 self._ptt_listener.stop()
+            self.session.close()
         except Exception:
             pass
         self.destroy()
@@ -707,7 +612,7 @@ class SettingsDialog(tk.Toplevel):
         super().__init__(app)
         self.app = app
         self.title("Settings")
-        self.geometry("520x360")
+        self.geometry("520x400")
         self.resizable(False, False)
         self.transient(app)
         self.grab_set()
@@ -754,6 +659,9 @@ class SettingsDialog(tk.Toplevel):
         ttk.Label(frm, text="Output Device Index").grid(row=8, column=0, sticky=tk.W, **pad)
         self.output_dev_var = tk.StringVar(value="" if getattr(app.cfg, 'output_device_index', None) is None else str(app.cfg.output_device_index))
         ttk.Entry(frm, textvariable=self.output_dev_var, width=10).grid(row=8, column=1, sticky=tk.W, **pad)
+        ttk.Label(frm, text="Loopback Device Index").grid(row=9, column=0, sticky=tk.W, **pad)
+        self.loopback_dev_var = tk.StringVar(value="" if app.cfg.loopback_device_index is None else str(app.cfg.loopback_device_index))
+        ttk.Entry(frm, textvariable=self.loopback_dev_var, width=10).grid(row=9, column=1, sticky=tk.W, **pad)
 
         # Buttons
         btns = ttk.Frame(self)
@@ -778,6 +686,8 @@ class SettingsDialog(tk.Toplevel):
             input_dev_index = int(input_dev) if input_dev else None
             output_dev = self.output_dev_var.get().strip()
             output_dev_index = int(output_dev) if output_dev else None
+            loopback_dev = self.loopback_dev_var.get().strip()
+            loopback_dev_index = int(loopback_dev) if loopback_dev else None
             question_only = bool(self.app.question_only_var.get())
 
             # Update in-memory cfg
@@ -792,12 +702,19 @@ class SettingsDialog(tk.Toplevel):
             app.cfg.rolling_min_suggest_gap = roll_gap
             app.cfg.input_device_index = input_dev_index
             app.cfg.output_device_index = output_dev_index
+            app.cfg.loopback_device_index = loopback_dev_index
             app.cfg.rolling_question_only = question_only
             app.seconds_var.set(seconds)
 
             # Restart listeners
             app._restart_global_hotkeys()
             app._restart_ptt_hold_listener()
+            try:
+                app.session.apply_loopback()
+            except Exception as e:
+                messagebox.showwarning("Settings", f"Loopback device failed to open: {e}")
+            # Restarting rolling mode on the new source can fail
+            app.rolling_var.set(bool(app.session.rolling_mic))
             # Update labels
             if app._hotkeys_label is not None:
                 app._hotkeys_label.config(text=", ".join(hotkeys))
@@ -841,6 +758,7 @@ class SettingsDialog(tk.Toplevel):
                 'ROLLING_MIN_SUGGEST_GAP': roll_gap,
                 'INPUT_DEVICE_INDEX': '' if input_dev_index is None else input_dev_index,
                 'OUTPUT_DEVICE_INDEX': '' if output_dev_index is None else output_dev_index,
+                'LOOPBACK_DEVICE_INDEX': '' if loopback_dev_index is None else loopback_dev_index,
                 'ROLLING_QUESTION_ONLY': question_only,
             }
             env_path = save_to_env(updates)
@@ -860,8 +778,8 @@ class DeviceTestDialog(tk.Toplevel):
         self.transient(app)
         self.grab_set()
 
-        self._mic: RollingMic | None = None
-        self._level = 0.0
+        self._mic: CaptureEngine | None = None
+        self._clipped = 0
         self._ui_running = True
 
         pad = {"padx": 10, "pady": 6}
@@ -919,21 +837,17 @@ class DeviceTestDialog(tk.Toplevel):
     def _start(self):
         if self._mic:
             return
-        idx = self.app._resolve_selected_device_index()
-        self._mic = RollingMic(samplerate=self.app.cfg.sample_rate, channels=1, device=idx, buffer_seconds=8)
         try:
-            self._mic.start()
+            # Attach to the app's shared capture stream (switching device if needed)
+            self._mic = self.app.session.ensure_capture()
+            self._clipped = self._mic.levels().clipped
             self._status.config(text="Recording… (speak)", foreground="#0a6")
         except Exception as e:
             self._status.config(text=f"Error: {e}", foreground="#a00")
             self._mic = None
 
     def _stop(self):
-        try:
-            if self._mic:
-                self._mic.stop()
-        except Exception:
-            pass
+        # The stream is shared with the app; just stop metering it
         self._mic = None
         self._status.config(text="Stopped", foreground="#666")
 
@@ -946,6 +860,8 @@ class DeviceTestDialog(tk.Toplevel):
             if data is None:
                 self._status.config(text="No recent audio yet", foreground="#a60")
                 return
+            # Playback outlives this call; do not hand it a view of the live buffer
+            data = data.copy()
             # Resolve from dialog dropdown first, then app toolbar selection
             out_idx = None
             label = self._out_var.get().strip() if hasattr(self, '_out_var') else ''
@@ -1002,14 +918,14 @@ class DeviceTestDialog(tk.Toplevel):
         if not self._ui_running:
             return
         try:
-            import numpy as np
             if self._mic:
-                data = self._mic.last_audio(1)
-                if data is not None and len(data) > 0:
-                    # Compute RMS in dBFS-ish (since PCM_16 written; here float32 [-1,1])
-                    rms = float(np.sqrt(np.mean(np.square(data))))
-                    level = max(0.0, min(1.0, rms * 8.0))  # simple scale
-                    self._meter['value'] = int(level * 100)
+                # Levels are kept up to date by the capture callback
+                lv = self._mic.levels()
+                level = max(0.0, min(1.0, lv.rms * 8.0))  # simple scale
+                self._meter['value'] = int(level * 100)
+                if lv.clipped > self._clipped:
+                    self._status.config(text="Clipping! Lower the input gain", foreground="#a00")
+                self._clipped = lv.clipped
         except Exception:
             pass
         finally:
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .audio import RollingMic
+
+
+class SessionArchive:
+    """Stream a capture source to disk for the whole session.
+
+    A background writer drains the source's ring buffer once per
+    ``flush_seconds`` and appends raw PCM to ``<name>.pcm``, so RAM use is
+    just the ring the source already has, however long the session runs.
+    A block index of ``[stream_start, file_start, frames]`` segments maps
+    stream positions to file frames (gaps from a restarted stream or a
+    writer that fell behind the ring are simply missing), and ``read``
+    serves any range through a memory map of the file. The index is
+    rewritten next to the PCM after every flush, so a crash loses at most
+    the last ``flush_seconds`` of it.
+    """
+
+    def __init__(self, source: RollingMic, directory: str | Path, flush_seconds: float = 1.0):
+        self.source = source
+        self.samplerate = source.samplerate
+        self.channels = source.channels
+        self.dtype = np.dtype(source.dtype)
+        self.flush_seconds = flush_seconds
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = time.strftime("session-%Y%m%d-%H%M%S")
+        self.path = directory / f"{stem}.pcm"
+        self.index_path = directory / f"{stem}.json"
+        self.segments: list[list[int]] = []
+        self.lost_frames = 0
+        self._file_frames = 0
+        self._pos = source.position
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._file = open(self.path, "ab")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._drain()
+        with self._lock:
+            self._file.close()
+        self._write_index()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self._drain()
+            except Exception:
+                pass
+
+    def _drain(self):
+        end = self.source.position
+        if end < self._pos:
+            # Source was restarted and counts from zero again
+            self._pos = 0
+        start = max(self._pos, self.source.oldest_position)
+        self.lost_frames += start - self._pos
+        data = self.source.audio_range(start, end)
+        if data is None:
+            return
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(memoryview(np.ascontiguousarray(data)))
+            self._file.flush()
+            last = self.segments[-1] if self.segments else None
+            if last and last[0] + last[2] == start:
+                last[2] += len(data)
+            else:
+                self.segments.append([start, self._file_frames, len(data)])
+            self._file_frames += len(data)
+        self._pos = end
+        self._write_index()
+
+    def _write_index(self):
+        with self._lock:
+            segments = [list(s) for s in self.segments]
+        meta = {
+            "samplerate": self.samplerate,
+            "channels": self.channels,
+            "dtype": self.dtype.str,
+            "segments": segments,
+        }
+        # Replace atomically so a crash mid-write never leaves a torn index
+        tmp = self.index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.index_path)
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio written so far."""
+        return self._file_frames / self.samplerate
+
+    def read(self, start: int, end: int) -> Optional[np.ndarray]:
+        """Return archived audio for stream positions ``[start, end)``.
+
+        Missing stretches (gaps) are skipped, so the result can be shorter
+        than requested. The data is copied out of the memory map.
+        """
+        with self._lock:
+            segments = [list(s) for s in self.segments]
+            n_file = self._file_frames
+        if n_file == 0:
+            return None
+        mm = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(n_file, self.channels))
+        parts = []
+        for seg_start, file_start, frames in segments:
+            lo = max(start, seg_start)
+            hi = min(end, seg_start + frames)
+            if hi > lo:
+                parts.append(mm[file_start + lo - seg_start:file_start + hi - seg_start])
+        if not parts:
+            return None
+        out = np.concatenate(parts, axis=0)
+        del mm
+        return out
+
+    def read_seconds(self, t0: float, t1: float) -> Optional[np.ndarray]:
+        """Like ``read`` with times in seconds on the source's stream clock."""
+        return self.read(int(t0 * self.samplerate), int(t1 * self.samplerate))
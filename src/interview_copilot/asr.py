@@ -0,0 +1,152 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .audio import encode_audio, resample, to_float32
+from .openai_client import transcribe_buffer, transcribe_words
+from .policy import RequestPolicy, policy_from_config
+from .scheduler import MANUAL, RequestScheduler
+
+Words = list[tuple[str, float, float]]
+
+
+class TranscriptionBackend:
+    """Turns PCM into text. Implementations must be safe to call from worker threads."""
+
+    name = "base"
+
+    def transcribe(self, data: np.ndarray, samplerate: int, priority: str = MANUAL) -> str:
+        raise NotImplementedError
+
+    def transcribe_words(self, data: np.ndarray, samplerate: int, priority: str = MANUAL) -> tuple[str, Words]:
+        """Return ``(text, [(word, start, end), ...])`` with times relative to ``data``."""
+        return self.transcribe(data, samplerate, priority), []
+
+    def close(self):
+        pass
+
+
+class OpenAIBackend(TranscriptionBackend):
+    """Upload encoded audio to the OpenAI transcription endpoint.
+
+    Requests go through ``policy`` (deadline, hedging, retries, failover),
+    so the SDK's own retries are switched off. With a ``scheduler`` every
+    attempt first takes rate budget at the caller's priority.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str = "whisper-1",
+        codec: str = "wav",
+        policy: RequestPolicy | None = None,
+        scheduler: RequestScheduler | None = None,
+    ):
+        self.client = client.with_options(max_retries=0)
+        self.model = model
+        self.codec = codec
+        self.policy = policy or RequestPolicy()
+        self.scheduler = scheduler
+        self.name = f"openai:{model}"
+
+    def _request(self, data: np.ndarray, samplerate: int, fn, priority: str):
+        encoded = encode_audio(data, samplerate, self.codec)
+        payload, name = encoded.getvalue(), encoded.name
+
+        def attempt(model: str):
+            if self.scheduler:
+                self.scheduler.acquire(model, 0, priority)
+            # Hedged attempts run concurrently, so each needs its own file object
+            buf = io.BytesIO(payload)
+            buf.name = name
+            return fn(self.client, buf, model=model)
+
+        return self.policy.call(attempt, self.model)
+
+    def transcribe(self, data: np.ndarray, samplerate: int, priority: str = MANUAL) -> str:
+        return self._request(data, samplerate, transcribe_buffer, priority)
+
+    def transcribe_words(self, data: np.ndarray, samplerate: int, priority: str = MANUAL) -> tuple[str, Words]:
+        return self._request(data, samplerate, transcribe_words, priority)
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """Whisper on the local CPU via faster-whisper (CTranslate2, int8 by default).
+
+    The model is loaded once in the background as soon as the backend is
+    created and warmed with a dummy inference. All inference runs on one
+    dedicated worker thread, so callers simply block their own worker
+    thread on the result and the Tk loop is never involved.
+    """
+
+    SAMPLERATE = 16000
+
+    def __init__(self, model: str = "base.en", compute_type: str = "int8", cpu_threads: int = 0, language: str | None = None):
+        self.model_name = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.language = language or ("en" if model.endswith(".en") else None)
+        self.name = f"local:{model}"
+        self._model = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-asr")
+        self.ready = self._executor.submit(self._load)
+
+    def _load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except Exception as e:
+            raise RuntimeError("Local transcription needs faster-whisper: pip install faster-whisper") from e
+        self._model = WhisperModel(
+            self.model_name, device="cpu", compute_type=self.compute_type, cpu_threads=self.cpu_threads
+        )
+        # First inference allocates buffers; pay for it now rather than on the first question
+        self._run(np.zeros((self.SAMPLERATE, 1), dtype=np.float32), self.SAMPLERATE, False)
+
+    def wait_ready(self, timeout: float | None = None):
+        """Block until the model is loaded; re-raises load errors."""
+        self.ready.result(timeout)
+
+    def _run(self, data: np.ndarray, samplerate: int, words: bool) -> tuple[str, Words]:
+        audio = to_float32(resample(data, samplerate, self.SAMPLERATE))
+        if audio.ndim == 2:
+            audio = audio.mean(axis=1)
+        segments, _info = self._model.transcribe(
+            np.ascontiguousarray(audio, dtype=np.float32),
+            language=self.language,
+            beam_size=1,
+            word_timestamps=words,
+            condition_on_previous_text=False,
+        )
+        texts: list[str] = []
+        out: Words = []
+        for seg in segments:
+            texts.append(seg.text.strip())
+            for w in (seg.words or []) if words else []:
+                out.append((w.word.strip(), float(w.start), float(w.end)))
+        return " ".join(t for t in texts if t).strip(), out
+
+    def transcribe(self, data: np.ndarray, samplerate: int, priority: str = MANUAL) -> str:
+        self.wait_ready()
+        return self._executor.submit(self._run, data.copy(), samplerate, False).result()[0]
+
+    def transcribe_words(self, data: np.ndarray, samplerate: int, priority: str = MANUAL) -> tuple[str, Words]:
+        self.wait_ready()
+        return self._executor.submit(self._run, data.copy(), samplerate, True).result()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def make_backend(cfg, client, scheduler: RequestScheduler | None = None) -> TranscriptionBackend:
+    """Build the transcription backend selected by ``cfg.transcribe_backend``."""
+    if cfg.transcribe_backend == "local":
+        return LocalWhisperBackend(
+            model=cfg.local_model,
+            compute_type=cfg.local_compute_type,
+            cpu_threads=cfg.local_cpu_threads,
+        )
+    policy = policy_from_config(cfg, cfg.transcribe_deadline_seconds, cfg.transcribe_fallback_model)
+    return OpenAIBackend(
+        client, model=cfg.transcribe_model, codec=cfg.upload_codec, policy=policy, scheduler=scheduler
+    )
@@ -1,131 +1,344 @@
-import tempfile
-from typing import Optional, List, Deque, Tuple
+import hashlib
+import io
+import math
+from dataclasses import dataclass
+from typing import Optional
 
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
-from collections import deque
 
 
-def record_to_wav_tempfile(
-    seconds: int = 10,
-    samplerate: int = 16000,
-    channels: int = 1,
-) -> str:
-    """Record microphone audio and write to a temporary WAV file.
+@dataclass(frozen=True)
+class UploadCodec:
+    """How audio is encoded before it is uploaded for transcription."""
 
-    Returns the file path to the temporary WAV file. Caller is responsible
-    for deleting the file after use.
+    name: str
+    format: str
+    subtype: str
+    ext: str
+    # Resample to this rate first; None keeps the capture rate
+    samplerate: Optional[int] = None
+
+
+UPLOAD_CODECS = {
+    "wav": UploadCodec("wav", "WAV", "PCM_16", ".wav"),
+    "wav_8k": UploadCodec("wav_8k", "WAV", "PCM_16", ".wav", samplerate=8000),
+    "wav_ulaw": UploadCodec("wav_ulaw", "WAV", "ULAW", ".wav"),
+    "flac": UploadCodec("flac", "FLAC", "PCM_16", ".flac"),
+    "opus": UploadCodec("opus", "OGG", "OPUS", ".ogg"),
+}
+
+
+def resolve_codec(name: str) -> UploadCodec:
+    """Look up a codec by name, falling back to WAV if unknown or unsupported.
+
+    Opus needs libsndfile >= 1.0.29, so availability is checked at runtime.
     """
-    frames = int(seconds * samplerate)
-    data = sd.rec(frames, samplerate=samplerate, channels=channels, dtype="float32")
-    sd.wait()
+    codec = UPLOAD_CODECS.get((name or "wav").strip().lower())
+    if codec is None:
+        return UPLOAD_CODECS["wav"]
+    try:
+        if codec.subtype not in sf.available_subtypes(codec.format):
+            return UPLOAD_CODECS["wav"]
+    except Exception:
+        return UPLOAD_CODECS["wav"]
+    return codec
+
 
-    # Ensure 2D shape (frames, channels)
+def resample(data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Cheap resampler for speech uploads.
+
+    Integer-factor downsampling averages each group of frames (a crude
+    low-pass); other ratios fall back to linear interpolation.
+    """
+    if src_rate == dst_rate or len(data) == 0:
+        return data
     if data.ndim == 1:
         data = data.reshape(-1, 1)
+    if src_rate > dst_rate and src_rate % dst_rate == 0:
+        factor = src_rate // dst_rate
+        n = (len(data) // factor) * factor
+        out = data[:n].reshape(-1, factor, data.shape[1]).mean(axis=1, dtype=np.float32)
+    else:
+        n_out = int(round(len(data) * dst_rate / src_rate))
+        x_old = np.arange(len(data), dtype=np.float64)
+        x_new = np.linspace(0, len(data) - 1, n_out)
+        out = np.stack([np.interp(x_new, x_old, data[:, c]) for c in range(data.shape[1])], axis=1)
+    return out.astype(data.dtype)
 
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    tmp.close()
-    sf.write(tmp.name, data, samplerate, format="WAV", subtype="PCM_16")
-    return tmp.name
 
+def encode_audio(data: np.ndarray, samplerate: int, codec: str = "wav") -> io.BytesIO:
+    """Encode PCM frames into an in-memory file using the given upload codec.
 
-class StreamRecorder:
-    def __init__(self, samplerate: int = 16000, channels: int = 1):
-        self.samplerate = samplerate
+    The returned buffer is rewound and carries a ``name`` so upload clients
+    can derive the filename and MIME type from it, just like a real file.
+    """
+    c = resolve_codec(codec)
+    if c.samplerate and c.samplerate != samplerate:
+        data = resample(data, samplerate, c.samplerate)
+        samplerate = c.samplerate
+    buf = io.BytesIO()
+    sf.write(buf, data, samplerate, format=c.format, subtype=c.subtype)
+    buf.seek(0)
+    buf.name = "audio" + c.ext
+    return buf
+
+
+def synthetic_speech(seconds: float, samplerate: int, seed: int = 0) -> np.ndarray:
+    """Speech-like int16 test signal for the benchmarks and tests.
+
+    Voiced harmonics with syllable-rate amplitude modulation plus noise,
+    shaped ``(frames, 1)`` like a capture.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    f0 = 140 + 25 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / samplerate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 3.5 * t), 0, None) ** 0.5
+    sig = 0.25 * voiced * envelope + 0.01 * rng.standard_normal(len(t))
+    return (np.clip(sig, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+
+
+class RingBuffer:
+    """Preallocated circular audio buffer with one writer and many readers.
+
+    The writer (an audio callback) copies each block into fixed storage and
+    only then publishes the new total frame count, so readers that snapshot
+    ``written`` never see a half-written block and no lock is needed. The
+    last ``reserve`` frames of capacity are never handed to readers: they are
+    what the writer overwrites next, which keeps returned views stable while
+    a reader works on them.
+    """
+
+    def __init__(self, capacity_frames: int, channels: int = 1, dtype: str = "int16", reserve_frames: int = 0):
         self.channels = channels
-        self._frames: List[np.ndarray] = []
-        self._stream: Optional[sd.InputStream] = None
-        self._active = False
+        self.dtype = np.dtype(dtype)
+        self.reserve = max(0, int(reserve_frames))
+        self.capacity = max(1, int(capacity_frames)) + self.reserve
+        self._buf = np.zeros((self.capacity, channels), dtype=self.dtype)
+        self._written = 0
 
-    def _callback(self, indata, frames, time, status):
-        if status:
-            # We ignore status messages, but could log
-            pass
-        # Copy to avoid referencing the same buffer
-        self._frames.append(indata.copy())
+    @property
+    def written(self) -> int:
+        """Total frames written since the last reset (monotonic)."""
+        return self._written
 
-    def start(self):
-        if self._active:
+    @property
+    def readable(self) -> int:
+        return min(self._written, self.capacity - self.reserve)
+
+    def reset(self):
+        self._written = 0
+
+    def write(self, block: np.ndarray):
+        n = len(block)
+        if n == 0:
             return
-        self._frames.clear()
-        self._stream = sd.InputStream(
-            samplerate=self.samplerate,
-            channels=self.channels,
-            dtype="float32",
-            callback=self._callback,
-        )
-        self._stream.start()
-        self._active = True
+        if block.ndim == 1:
+            block = block.reshape(-1, 1)
+        written = self._written
+        if n > self.capacity:
+            # Only the newest capacity frames can survive anyway
+            written += n - self.capacity
+            block = block[-self.capacity:]
+            n = self.capacity
+        start = written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = block[:first]
+        if first < n:
+            self._buf[:n - first] = block[first:]
+        # Publish only after the data is in place
+        self._written = written + n
 
-    def stop_and_save(self) -> Optional[str]:
-        if not self._active:
-            return None
-        try:
-            self._stream.stop()
-            self._stream.close()
-        finally:
-            self._active = False
+    def read_range(self, start: int, end: int) -> Optional[np.ndarray]:
+        """Return frames ``[start, end)`` in absolute stream positions.
 
-        if not self._frames:
-            return None
-        data = np.concatenate(self._frames, axis=0)
-        # Ensure 2D
-        if data.ndim == 1:
-            data = data.reshape(-1, 1)
-        # Too short? ignore if < 0.2s
-        min_frames = int(0.2 * self.samplerate)
-        if data.shape[0] < min_frames:
+        The result is a view into the buffer when the range is contiguous and
+        a single copy when it wraps. Positions older than the readable window
+        are clipped.
+        """
+        written = self._written
+        end = min(int(end), written)
+        start = max(int(start), written - (self.capacity - self.reserve), 0)
+        if end <= start:
             return None
+        s = start % self.capacity
+        e = s + (end - start)
+        if e <= self.capacity:
+            return self._buf[s:e]
+        return np.concatenate((self._buf[s:], self._buf[:e - self.capacity]), axis=0)
+
+    @property
+    def oldest(self) -> int:
+        """Oldest absolute position still readable."""
+        return max(0, self._written - (self.capacity - self.reserve))
+
+    def read_last(self, frames: int) -> Optional[np.ndarray]:
+        end = self._written
+        return self.read_range(end - int(frames), end)
+
 
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-        tmp.close()
-        sf.write(tmp.name, data, self.samplerate, format="WAV", subtype="PCM_16")
-        return tmp.name
+def to_float32(data: np.ndarray) -> np.ndarray:
+    """Convert integer PCM to float32 in [-1, 1]; float input is returned as is."""
+    if data.dtype.kind == "f":
+        return data
+    return data.astype(np.float32) / float(np.iinfo(data.dtype).max + 1)
+
+
+def audio_fingerprint(data: np.ndarray, samplerate: int) -> str:
+    """Content hash of PCM audio for caching transcripts.
+
+    The waveform itself is hashed, mixed to mono, averaged down to about
+    4 kHz and quantized to 8 bits, together with the frame count and rate.
+    The same capture therefore maps to the same key whatever its dtype or
+    channel layout, while any audibly different clip (including one that
+    only differs in sign or length) gets a different key.
+    """
+    x = to_float32(data)
+    if x.ndim == 2:
+        x = x.mean(axis=1) if x.shape[1] > 1 else x[:, 0]
+    factor = max(1, samplerate // 4000)
+    n = len(x) // factor
+    down = x[: n * factor].reshape(n, factor).mean(axis=1)
+    if n * factor < len(x):
+        down = np.append(down, x[n * factor :].mean())
+    q = np.clip(np.round(down * 127.0), -127, 127).astype(np.int8)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.array([len(x), samplerate], dtype=np.int64).tobytes())
+    h.update(q.tobytes())
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class Levels:
+    rms: float = 0.0  # smoothed RMS, fraction of full scale
+    peak: float = 0.0  # decaying peak, fraction of full scale
+    clipped: int = 0  # clipped samples since the stream started
+
+    @property
+    def rms_db(self) -> float:
+        return 20.0 * math.log10(max(self.rms, 1e-5))
+
+
+class LevelMeter:
+    """Running RMS, peak and clip count, updated from the audio callback.
+
+    Each update is O(block) on a reusable scratch buffer; ``snapshot`` only
+    reads a few numbers, so UI code can poll it without any NumPy work.
+    """
+
+    def __init__(self, samplerate: int, rms_tau: float = 0.3, peak_fall: float = 0.05, clip_level: float = 0.999):
+        self.samplerate = samplerate
+        self.rms_tau = rms_tau
+        # Fraction of the held peak left after one second
+        self.peak_fall = peak_fall
+        self.clip_level = clip_level
+        self._scratch = np.empty(0, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self._ms = 0.0
+        self._peak = 0.0
+        self._clipped = 0
+
+    def update(self, block: np.ndarray):
+        v = block.reshape(-1)
+        n = len(v)
+        if n == 0:
+            return
+        if len(self._scratch) < n:
+            self._scratch = np.empty(n, dtype=np.float32)
+        x = self._scratch[:n]
+        if v.dtype.kind == "f":
+            np.copyto(x, v)
+        else:
+            np.multiply(v, 1.0 / (np.iinfo(v.dtype).max + 1), out=x)
+        ms = float(np.dot(x, x)) / n
+        np.abs(x, out=x)
+        peak = float(x.max())
+        if peak >= self.clip_level:
+            self._clipped += int(np.count_nonzero(x >= self.clip_level))
+        dt = len(block) / self.samplerate
+        self._ms += (1.0 - math.exp(-dt / self.rms_tau)) * (ms - self._ms)
+        self._peak = max(peak, self._peak * self.peak_fall ** dt)
+
+    def snapshot(self) -> Levels:
+        return Levels(math.sqrt(self._ms), self._peak, self._clipped)
 
 
 class RollingMic:
-    """Continuously record into a ring buffer and allow exporting the last N seconds."""
+    """Continuously record into a ring buffer and allow exporting the last N seconds.
+
+    Audio is kept in a fixed, preallocated buffer (int16 by default) so memory
+    stays constant and the callback never allocates. ``last_audio`` and
+    ``audio_range`` return a view into that buffer (one copy if the window
+    wraps). A view of ``span`` seconds stays intact for only about
+    ``buffer_seconds + 1 - span`` seconds of further capture (the 1 s being
+    the ring's reserve), so a read of the whole buffer is safe for just one
+    second: copy anything kept past the current call.
+    """
 
-    def __init__(self, samplerate: int = 16000, channels: int = 1, device: Optional[int] = None, buffer_seconds: int = 12):
+    def __init__(
+        self,
+        samplerate: int = 16000,
+        channels: int = 1,
+        device: Optional[int] = None,
+        buffer_seconds: int = 12,
+        dtype: str = "int16",
+    ):
         self.samplerate = samplerate
         self.channels = channels
         self.device = device
         self.buffer_seconds = buffer_seconds
-        self._frames: Deque[np.ndarray] = deque()
-        self._total_frames = 0
-        self._max_frames = int(self.samplerate * self.buffer_seconds)
-        self._stream: Optional[sd.InputStream] = None
+        self.dtype = dtype
+        # One second of headroom the callback can write into while readers
+        # still hold views of the oldest requested audio
+        self._ring = RingBuffer(
+            int(self.samplerate * self.buffer_seconds),
+            channels=channels,
+            dtype=dtype,
+            reserve_frames=self.samplerate,
+        )
+        self._meter = LevelMeter(samplerate)
+        self._stream = None
         self._active = False
 
     def _callback(self, indata, frames, time, status):
         if status:
             # We ignore status, could log
             pass
-        chunk = indata.copy()
-        self._frames.append(chunk)
-        self._total_frames += len(chunk)
-        # Trim old frames
-        while self._total_frames > self._max_frames and self._frames:
-            dropped = self._frames.popleft()
-            self._total_frames -= len(dropped)
+        self._ring.write(indata)
+        self._meter.update(indata)
+
+    def levels(self) -> Levels:
+        """Cheap snapshot of the input level, maintained by the callback."""
+        return self._meter.snapshot()
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def _open_stream(self):
+        import sounddevice as sd
 
-    def start(self):
-        if self._active:
-            return
-        self._frames.clear()
-        self._total_frames = 0
         self._stream = sd.InputStream(
             samplerate=self.samplerate,
             channels=self.channels,
-            dtype="float32",
+            dtype=self.dtype,
             callback=self._callback,
             device=self.device,
         )
         self._stream.start()
         self._active = True
 
+    def start(self):
+        if self._active:
+            return
+        self._ring.reset()
+        self._meter.reset()
+        self._open_stream()
+
     def stop(self):
         if not self._active:
             return
@@ -134,31 +347,37 @@ class RollingMic:
         finally:
             self._active = False
 
-    def last_audio(self, seconds: int) -> Optional[np.ndarray]:
-        if not self._frames:
-            return None
-        need = int(seconds * self.samplerate)
-        chunks = []
-        total = 0
-        for arr in reversed(self._frames):
-            chunks.append(arr)
-            total += len(arr)
-            if total >= need:
-                break
-        if not chunks:
-            return None
-        data = np.concatenate(list(reversed(chunks)), axis=0)
-        if data.ndim == 1:
-            data = data.reshape(-1, 1)
-        if len(data) > need:
-            data = data[-need:]
-        return data
+    @property
+    def position(self) -> int:
+        """Frames captured since start; use with ``audio_range``."""
+        return self._ring.written
 
-    def last_wav_tempfile(self, seconds: int) -> Optional[str]:
-        data = self.last_audio(seconds)
-        if data is None or len(data) < int(0.2 * self.samplerate):
-            return None
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-        tmp.close()
-        sf.write(tmp.name, data, self.samplerate, format="WAV", subtype="PCM_16")
-        return tmp.name
+    @property
+    def oldest_position(self) -> int:
+        """Oldest position ``audio_range`` can still return."""
+        return self._ring.oldest
+
+    def audio_range(self, start: int, end: int) -> Optional[np.ndarray]:
+        return self._ring.read_range(start, end)
+
+    def last_audio(self, seconds: float) -> Optional[np.ndarray]:
+        return self._ring.read_last(int(seconds * self.samplerate))
+
+
+class CaptureEngine(RollingMic):
+    """Long-lived capture stream shared by every recording path.
+
+    The stream is opened once and kept running, so hotkey capture,
+    push-to-talk, rolling mode and the device test all read from the same
+    buffer without paying device-open latency, and a capture can include
+    audio from just before it was requested. Stream positions keep counting
+    across device switches.
+    """
+
+    def switch_device(self, device: Optional[int]):
+        """Reopen on another input device without resetting stream positions."""
+        if device == self.device and self._active:
+            return
+        self.stop()
+        self.device = device
+        self._open_stream()
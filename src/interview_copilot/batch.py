@@ -0,0 +1,213 @@
+"""Transcribe recorded interviews and draft suggestions without the UI.
+
+Usage:
+    python -m interview_copilot.batch session1.wav session2.flac ...
+        [--out results.jsonl] [--workers 8] [--rate-limits MODEL=RPM/TPM,...]
+        [--style Concise] [--all-utterances] [--no-suggest]
+
+Each file is split into utterances with the same endpointer rolling mode
+uses. Utterances are transcribed and, when they read like questions,
+answered on a pool of ``--workers`` threads that share one rate budget
+(``--rate-limits``, default RATE_LIMITS from the config). One JSON object
+per utterance is written as soon as it finishes, with the time spent
+queued, in each stage and in total (milliseconds).
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import soundfile as sf
+
+from .asr import TranscriptionBackend, make_backend
+from .config import load_config
+from .openai_client import chat_complete, make_client
+from .policy import policy_from_config
+from .scheduler import MANUAL, RequestScheduler, parse_rate_limits
+from .suggester import build_system_prompt, build_user_prompt, load_resume, looks_like_question
+from .tokens import TokenMeter, count_tokens
+from .vad import Endpointer, Utterance, VoiceActivityDetector
+
+# Rough completion size used to charge the tokens-per-minute budget
+OUTPUT_TOKENS = 400
+
+
+@dataclass
+class BatchItem:
+    file: str
+    index: int
+    start: float
+    end: float
+    transcript: str = ""
+    question: bool = False
+    suggestions: str = ""
+    error: str = ""
+    timings: dict[str, float] = field(default_factory=dict)
+    # Suggestion request tokens: prompt, cached prefix, completion, local estimate
+    tokens: dict[str, int] = field(default_factory=dict)
+
+
+def split_utterances(data: np.ndarray, samplerate: int, cfg) -> list[Utterance]:
+    """Run the endpointer over a whole recording in one-second steps."""
+    vad = VoiceActivityDetector(
+        samplerate=samplerate,
+        energy_db=cfg.vad_energy_db,
+        snr_db=cfg.vad_snr_db,
+        min_speech_ratio=cfg.vad_min_speech_ratio,
+    )
+    endpointer = Endpointer(
+        vad,
+        hangover_ms=cfg.endpoint_hangover_ms,
+        max_utterance_seconds=cfg.endpoint_max_utterance_seconds,
+    )
+    # Feed it the way the live stream does so the noise floor adapts over time
+    step = vad.frame_len * max(1, samplerate // vad.frame_len)
+    found: list[Utterance] = []
+    pos = 0
+    while pos < len(data):
+        found += endpointer.process(data[pos : pos + step], pos)
+        if endpointer.position == pos:
+            break  # less than one frame left
+        pos = endpointer.position
+    last = endpointer.flush()
+    if last:
+        found.append(last)
+    return found
+
+
+class BatchRunner:
+    """Transcribe and answer utterances concurrently within the shared rate budget."""
+
+    def __init__(
+        self,
+        cfg,
+        asr: TranscriptionBackend,
+        client,
+        scheduler: RequestScheduler,
+        style: str = "Concise",
+        question_only: bool = True,
+        suggest: bool = True,
+    ):
+        self.asr = asr
+        self.client = client.with_options(max_retries=0)
+        self.scheduler = scheduler
+        self.model = cfg.suggest_model
+        self.question_only = question_only
+        self.suggest = suggest
+        # The whole completion is awaited here, not just the first token
+        self.policy = policy_from_config(cfg, cfg.api_read_timeout, cfg.suggest_fallback_model)
+        self.style = style
+        self.system = build_system_prompt(load_resume(cfg.resume_file))
+        self.tokens = TokenMeter()
+
+    def _suggest(self, item: BatchItem) -> str:
+        user = build_user_prompt(item.transcript, style=self.style)
+        prompt_tokens = count_tokens(self.system, self.model) + count_tokens(user, self.model)
+
+        def on_usage(usage):
+            one = self.tokens.record(usage, prompt_tokens)
+            item.tokens = {
+                "prompt": one.prompt, "cached": one.cached, "completion": one.completion, "estimated": one.estimated
+            }
+
+        def attempt(model: str) -> str:
+            self.scheduler.acquire(model, prompt_tokens + OUTPUT_TOKENS, MANUAL)
+            return chat_complete(self.client, model, self.system, user, on_usage=on_usage)
+
+        return self.policy.call(attempt, self.model)
+
+    def run(self, item: BatchItem, clip: np.ndarray, samplerate: int, submitted: float) -> BatchItem:
+        t0 = time.perf_counter()
+        item.timings["queued_ms"] = round((t0 - submitted) * 1000, 1)
+        try:
+            item.transcript = self.asr.transcribe(clip, samplerate, MANUAL).strip()
+            t1 = time.perf_counter()
+            item.timings["transcribe_ms"] = round((t1 - t0) * 1000, 1)
+            item.question = looks_like_question(item.transcript)
+            if self.suggest and item.transcript and (item.question or not self.question_only):
+                item.suggestions = self._suggest(item)
+                item.timings["suggest_ms"] = round((time.perf_counter() - t1) * 1000, 1)
+        except Exception as e:
+            item.error = f"{type(e).__name__}: {e}"
+        item.timings["total_ms"] = round((time.perf_counter() - submitted) * 1000, 1)
+        return item
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("files", nargs="+", help="WAV/FLAC recordings")
+    ap.add_argument("--out", default="-", help="JSONL output path (default: stdout)")
+    ap.add_argument("--workers", type=int, default=8, help="utterances processed at once")
+    ap.add_argument("--rate-limits", help="MODEL=RPM/TPM,... (default: RATE_LIMITS)")
+    ap.add_argument("--style", default="Concise", help="Concise, STAR or Technical")
+    ap.add_argument("--all-utterances", action="store_true", help="suggest for every utterance, not only questions")
+    ap.add_argument("--no-suggest", action="store_true", help="transcribe only")
+    args = ap.parse_args(argv)
+
+    cfg = load_config()
+    # Duplicate requests only eat into the budget when running at the rate limit
+    cfg.hedge_percentile = 0.0
+    workers = max(1, args.workers)
+    limits = args.rate_limits if args.rate_limits is not None else cfg.rate_limits
+    # Everything here is foreground work, so nothing is held in reserve
+    scheduler = RequestScheduler(parse_rate_limits(limits), reserve=0.0)
+    client = make_client(
+        cfg.openai_api_key,
+        cfg.api_connect_timeout,
+        cfg.api_read_timeout,
+        max_connections=workers,
+        base_url=cfg.openai_base_url,
+    )
+    asr = make_backend(cfg, client, scheduler)
+    runner = BatchRunner(
+        cfg,
+        asr,
+        client,
+        scheduler,
+        style=args.style,
+        question_only=not args.all_utterances,
+        suggest=not args.no_suggest,
+    )
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    started = time.perf_counter()
+    count = errors = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+            futures = []
+            for path in args.files:
+                try:
+                    data, sr = sf.read(path, dtype="int16", always_2d=True)
+                except Exception as e:
+                    print(f"{path}: {e}", file=sys.stderr)
+                    errors += 1
+                    continue
+                spans = split_utterances(data, sr, cfg)
+                print(f"{path}: {len(data) / sr:.1f}s, {len(spans)} utterances", file=sys.stderr)
+                for i, u in enumerate(spans):
+                    item = BatchItem(path, i, round(u.start / sr, 2), round(u.end / sr, 2))
+                    futures.append(pool.submit(runner.run, item, data[u.start : u.end], sr, time.perf_counter()))
+            for fut in as_completed(futures):
+                item = fut.result()
+                count += 1
+                errors += bool(item.error)
+                out.write(json.dumps(asdict(item), ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        asr.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{count} utterances in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.2f}/s), {errors} errors; "
+        f"suggestions: {runner.tokens.summary()}",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
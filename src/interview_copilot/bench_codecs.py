@@ -0,0 +1,84 @@
+"""Compare upload codecs: encoded size, encode time and upload time.
+
+Usage:
+    python -m interview_copilot.bench_codecs [--file clip.wav] [--seconds 6]
+        [--repeat 20] [--upload] [--codecs flac,opus]
+
+Without ``--file`` a synthetic, speech-like signal is used. ``--upload``
+sends each encoding to the configured transcription model (needs
+OPENAI_API_KEY) and reports the round-trip time and transcript. The size
+ratio is relative to the uncompressed 16-bit WAV.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from .audio import UPLOAD_CODECS, encode_audio, resolve_codec, synthetic_speech
+
+
+def _load(path: str | None, seconds: float, samplerate: int) -> tuple[np.ndarray, int]:
+    if not path:
+        return synthetic_speech(seconds, samplerate), samplerate
+    data, sr = sf.read(path, dtype="int16", always_2d=True)
+    if seconds:
+        data = data[: int(seconds * sr)]
+    return data, sr
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--file", help="WAV/FLAC file to encode (default: synthetic)")
+    ap.add_argument("--seconds", type=float, default=6.0, help="clip length to use")
+    ap.add_argument("--samplerate", type=int, default=16000, help="rate for the synthetic clip")
+    ap.add_argument("--repeat", type=int, default=20, help="encode repetitions per codec")
+    ap.add_argument("--codecs", default=",".join(UPLOAD_CODECS), help="comma-separated codec names")
+    ap.add_argument("--upload", action="store_true", help="also time a real transcription request")
+    args = ap.parse_args(argv)
+
+    data, sr = _load(args.file, args.seconds, args.samplerate)
+    client = model = None
+    if args.upload:
+        from .config import load_config
+        from .openai_client import make_client
+        cfg = load_config()
+        client = make_client(
+            cfg.openai_api_key, cfg.api_connect_timeout, cfg.api_read_timeout, base_url=cfg.openai_base_url
+        )
+        model = cfg.transcribe_model
+
+    print(f"clip: {len(data) / sr:.1f}s @ {sr} Hz, {data.shape[1]} ch")
+    header = f"{'codec':<10} {'bytes':>9} {'ratio':>6} {'encode ms':>10}"
+    if client:
+        header += f" {'upload ms':>10}  transcript"
+    print(header)
+    baseline = len(encode_audio(data, sr, "wav").getbuffer())
+    for name in [c.strip() for c in args.codecs.split(",") if c.strip()]:
+        if resolve_codec(name).name != name:
+            print(f"{name:<10} unavailable (libsndfile lacks it)")
+            continue
+        times = []
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            buf = encode_audio(data, sr, name)
+            times.append((time.perf_counter() - t0) * 1000)
+        size = len(buf.getbuffer())
+        line = f"{name:<10} {size:>9} {size / baseline:>6.2f} {statistics.median(times):>10.2f}"
+        if client:
+            from .openai_client import transcribe_buffer
+            buf.seek(0)
+            t0 = time.perf_counter()
+            try:
+                text = transcribe_buffer(client, buf, model=model)
+            except Exception as e:
+                text = f"error: {e}"
+            line += f" {(time.perf_counter() - t0) * 1000:>10.0f}  {text[:60]!r}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""End-to-end latency benchmark for the capture and rolling paths.
+
+Usage:
+    python -m interview_copilot.bench_latency [--file interview.wav]
+        [--requests 30] [--rolling-seconds 20] [--rolling-mode endpoint] [--live]
+        [--transcribe-ms 350] [--ttft-ms 300] [--token-ms 12] [--jitter 0.35]
+        [--error-rate 0] [--seed 1] [--json results.json] [--max-p95 STAGE=MS,...]
+        [--allow-failures]
+
+Drives the app's ``CopilotSession`` (everything but the window): the
+capture path goes through ``CopilotSession.process_audio`` on the manual
+job pool, and rolling mode is switched on with
+``CopilotSession.start_rolling``, so the configured rolling source (VAD,
+endpointer or stitcher, or the realtime socket), the transcript cache, the
+question classifier and conversation memory all run as they do in the app.
+The recording is replayed in real time into a capture engine that stands
+in for the microphone.
+
+By default every request goes to an in-process mock server (see
+mock_server), including the realtime websocket for ``--rolling-mode
+streaming``. ``--live`` uses the configured API instead, which needs
+OPENAI_API_KEY and is billed. Without ``--file`` a synthetic, speech-like
+clip is used. The report gives p50/p95/p99 per stage. With ``--max-p95``
+the exit status is 1 when any listed stage is slower than its budget or
+has no samples at all, so CI can catch regressions; failed or superseded
+requests also exit 1 unless ``--allow-failures`` is given.
+"""
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import soundfile as sf
+
+from .audio import CaptureEngine, synthetic_speech
+from .batch import split_utterances
+from .config import AppConfig, load_config
+from .mock_server import MockOpenAIServer, MockSettings
+from .openai_client import make_client
+from .scheduler import MANUAL
+from .session import CopilotSession
+
+
+def percentile(samples: list[float], p: float) -> float:
+    """Nearest-rank percentile (``p`` in 0-100)."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def check_budgets(results: dict, failures: dict, max_p95: str, allow_failures: bool = False) -> list[str]:
+    """Return why the run misses its ``STAGE=MS,...`` p95 budgets; empty when it passes.
+
+    A budgeted stage without samples fails too: the path broke or never ran.
+    """
+    over = []
+    for item in max_p95.split(","):
+        stage, _, budget = item.strip().partition("=")
+        if not stage or not budget:
+            continue
+        if stage not in results:
+            over.append(f"{stage} has no samples (budget {float(budget):.0f} ms)")
+        elif results[stage]["p95"] > float(budget):
+            over.append(f"{stage} p95 {results[stage]['p95']:.0f} ms > {float(budget):.0f} ms")
+    if not allow_failures:
+        over += [f"{path}: {n} failed or superseded" for path, n in failures.items()]
+    return over
+
+
+class _Probe:
+    """Turn the session's UI events into stage timings.
+
+    ``mark`` starts a request. Suggestion timings run from the transcript
+    being posted (capture) or accepted by the classifier (rolling);
+    ``capture.end_to_end`` runs from the audio being handed over.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.failures: dict[str, int] = defaultdict(int)
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._path = ""
+        self._start: float | None = None
+        self._t0: float | None = None
+        self._first = False
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds * 1000)
+
+    def fail(self, path: str):
+        with self._lock:
+            self.failures[path] += 1
+
+    def mark(self, path: str):
+        now = time.perf_counter()
+        with self._lock:
+            self._path, self._start, self._t0, self._first = path, now, now, False
+        self.done.clear()
+
+    def emit(self, kind: str, payload):
+        now = time.perf_counter()
+        with self._lock:
+            if self._start is None:
+                return
+            path = self._path
+            if kind == "transcript":
+                if path == "capture":
+                    self._t0 = now
+                return
+            if kind == "suggest_delta":
+                if not self._first:
+                    self._first = True
+                    self.samples[f"{path}.first_token"].append((now - self._t0) * 1000)
+                return
+            if kind == "suggestions":
+                self.samples[f"{path}.suggest"].append((now - self._t0) * 1000)
+                if path == "capture":
+                    self.samples["capture.end_to_end"].append((now - self._start) * 1000)
+                self._start = None
+            elif kind in ("failed", "superseded"):
+                self.failures[path] += 1
+                self._start = None
+            else:
+                return
+        self.done.set()
+
+    def pump(self, q: queue.Queue, stop: threading.Event):
+        """Drain the session's event queue, as ``App._poll_queue`` would."""
+        while not stop.is_set():
+            try:
+                kind, payload = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.emit(kind, payload)
+
+
+class _TimedSession(CopilotSession):
+    """The app's session with its transcription and classification timed.
+
+    ``engine`` stands in for the interviewer's capture source.
+    """
+
+    def __init__(self, cfg, engine: CaptureEngine, probe: _Probe):
+        client = make_client(
+            cfg.openai_api_key, cfg.api_connect_timeout, cfg.api_read_timeout, base_url=cfg.openai_base_url
+        )
+        super().__init__(cfg, client)
+        self._engine = engine
+        self._probe = probe
+
+    def interviewer_engine(self) -> CaptureEngine:
+        return self._engine
+
+    def transcribe(self, data, priority: str = MANUAL) -> str:
+        path = "capture" if priority == MANUAL else "rolling"
+        t0 = time.perf_counter()
+        try:
+            text = super().transcribe(data, priority)
+        except Exception:
+            # A failed capture is reported through the event queue
+            if path == "rolling":
+                self._probe.fail(path)
+            raise
+        self._probe.add(f"{path}.transcribe", time.perf_counter() - t0)
+        return text
+
+    def transcribe_words(self, data, priority: str = MANUAL) -> tuple[str, list]:
+        t0 = time.perf_counter()
+        try:
+            hit = super().transcribe_words(data, priority)
+        except Exception:
+            self._probe.fail("rolling")
+            raise
+        self._probe.add("rolling.transcribe", time.perf_counter() - t0)
+        return hit
+
+    def classify_transcript(self, transcript: str) -> bool:
+        accepted = super().classify_transcript(transcript)
+        if accepted:
+            self._probe.mark("rolling")
+        return accepted
+
+
+class _Replay(threading.Thread):
+    """Feed a recording into a capture engine in real time, looping, like a microphone."""
+
+    BLOCK_SECONDS = 0.02
+
+    def __init__(self, engine: CaptureEngine, recording: np.ndarray):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.recording = recording
+        self.stopped = threading.Event()
+
+    def run(self):
+        block = max(1, int(self.BLOCK_SECONDS * self.engine.samplerate))
+        pos, next_at = 0, time.perf_counter()
+        while not self.stopped.is_set():
+            chunk = self.recording[pos : pos + block]
+            pos = (pos + block) % len(self.recording)
+            # The engine's own audio callback: ring buffer and meter
+            self.engine._callback(chunk, len(chunk), None, None)
+            next_at += len(chunk) / self.engine.samplerate
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+def _clips(path: str | None, cfg) -> tuple[list[np.ndarray], np.ndarray, int]:
+    """Utterances for the capture path and the whole recording for rolling."""
+    if not path:
+        sr = cfg.sample_rate
+        clip = synthetic_speech(4.0, sr)
+        return [clip], np.concatenate([clip, np.zeros((sr, 1), dtype=np.int16)] * 4), sr
+    data, sr = sf.read(path, dtype="int16", always_2d=True)
+    clips = [data[u.start : u.end] for u in split_utterances(data, sr, cfg)]
+    return clips or [data], data, sr
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--file", help="WAV/FLAC recording (default: synthetic)")
+    ap.add_argument("--requests", type=int, default=30, help="capture-path requests")
+    ap.add_argument("--rolling-seconds", type=float, default=20.0, help="how long to run rolling mode (0 skips)")
+    ap.add_argument("--rolling-mode", help="window, incremental, endpoint or streaming (default: ROLLING_MODE)")
+    ap.add_argument("--live", action="store_true", help="use the configured API instead of the mock")
+    ap.add_argument("--transcribe-ms", type=float, default=350.0, help="mock: median transcription latency")
+    ap.add_argument("--ttft-ms", type=float, default=300.0, help="mock: median time to first chat token")
+    ap.add_argument("--token-ms", type=float, default=12.0, help="mock: median gap between tokens")
+    ap.add_argument("--jitter", type=float, default=0.35, help="mock: log-normal sigma of latencies")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="mock: share of failing requests")
+    ap.add_argument("--seed", type=int, help="mock: random seed")
+    ap.add_argument("--json", help="also write the results to this file")
+    ap.add_argument("--max-p95", default="", help="STAGE=MS,... budgets; exit 1 when exceeded or unmeasured")
+    ap.add_argument("--allow-failures", action="store_true", help="do not exit 1 on failed requests")
+    args = ap.parse_args(argv)
+
+    server = None
+    if args.live:
+        cfg = load_config()
+    else:
+        cfg = AppConfig(openai_api_key="mock")
+        streaming = (args.rolling_mode or cfg.rolling_mode) == "streaming" and args.rolling_seconds > 0
+        server = MockOpenAIServer(
+            MockSettings(
+                transcribe_ms=args.transcribe_ms,
+                ttft_ms=args.ttft_ms,
+                token_ms=args.token_ms,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+                seed=args.seed,
+            ),
+            realtime_port=0 if streaming else None,
+        ).start()
+        cfg.openai_base_url = server.base_url
+        if streaming:
+            cfg.realtime_url = server.realtime_url
+    if args.rolling_mode:
+        cfg.rolling_mode = args.rolling_mode.strip().lower()
+    # Hosted transcription only: a local model would time the CPU, not the API path
+    cfg.transcribe_backend = "openai"
+    clips, recording, sr = _clips(args.file, cfg)
+    cfg.sample_rate = sr
+
+    probe = _Probe()
+    engine = CaptureEngine(samplerate=sr, buffer_seconds=max(30, cfg.capture_buffer_seconds))
+    session = _TimedSession(cfg, engine, probe)
+    session.start_asr()
+    session.start_pipeline()
+    stop = threading.Event()
+    threading.Thread(target=probe.pump, args=(session.events, stop), daemon=True).start()
+    replay = _Replay(engine, recording)
+    where = "live API" if args.live else f"mock {server.base_url}"
+    print(f"{where}; {len(clips)} utterances @ {sr} Hz; rolling mode {cfg.rolling_mode}", file=sys.stderr)
+    try:
+        session.pipeline.warm()
+        # Capture path: one request at a time, like repeated button presses.
+        # Each press captures new audio, so no two clips share a fingerprint.
+        for i in range(args.requests):
+            clip = clips[i % len(clips)]
+            clip = np.concatenate([clip, np.zeros((i // len(clips), clip.shape[1]), dtype=clip.dtype)])
+            probe.mark("capture")
+            session.jobs.submit(lambda t, clip=clip: session.run_audio_job(t, clip), "bench")
+            if not probe.done.wait(60):
+                probe.fail("capture")
+
+        # Rolling path: the configured rolling source over the replayed recording
+        if args.rolling_seconds > 0:
+            replay.start()
+            if session.start_rolling():
+                time.sleep(args.rolling_seconds)
+            session.stop_rolling()
+            # Let the last suggestion finish
+            probe.done.wait(10)
+    finally:
+        replay.stopped.set()
+        stop.set()
+        session.close()
+        if server:
+            server.stop()
+
+    results = {
+        stage: {
+            "n": len(vals),
+            "p50": round(percentile(vals, 50), 1),
+            "p95": round(percentile(vals, 95), 1),
+            "p99": round(percentile(vals, 99), 1),
+        }
+        for stage, vals in sorted(probe.samples.items())
+        if vals
+    }
+    print(f"{'stage':<22} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, r in results.items():
+        print(f"{stage:<22} {r['n']:>5} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f}")
+    failures = {path: n for path, n in sorted(probe.failures.items()) if n}
+    for path, n in failures.items():
+        print(f"{path}: {n} failed or superseded")
+    print(f"suggestion tokens: {session.pipeline.tokens.summary()}")
+    print(f"transcript cache: {session.transcript_cache.stats.hits} hits; suggestions: {session.pipeline.cache_summary()}")
+    if server:
+        print(f"mock server requests: {dict(sorted(server.counts.items()))}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"stages": results, "failures": failures}, f, indent=2)
+
+    problems = check_budgets(results, failures, args.max_p95, args.allow_failures)
+    for line in problems:
+        print(f"FAIL {line}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
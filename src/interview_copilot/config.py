@@ -9,6 +9,11 @@ from dotenv import load_dotenv, find_dotenv, set_key
 class AppConfig:
     openai_api_key: str
     transcribe_model: str = "whisper-1"
+    # "openai" uploads to TRANSCRIBE_MODEL; "local" runs faster-whisper on CPU
+    transcribe_backend: str = "openai"
+    local_model: str = "base.en"
+    local_compute_type: str = "int8"
+    local_cpu_threads: int = 0
     suggest_model: str = "gpt-4o-mini"
     capture_seconds: int = 10
     sample_rate: int = 16000
@@ -25,7 +30,72 @@ class AppConfig:
     rolling_min_suggest_gap: int = 6
     input_device_index: int | None = None
     rolling_question_only: bool = True
+    # "window" re-transcribes the whole window each step; "incremental" sends
+    # only new audio plus a small overlap and stitches a running transcript;
+    # "endpoint" transcribes each utterance as soon as the speaker stops;
+    # "streaming" sends audio continuously over a realtime websocket
+    rolling_mode: str = "window"
+    rolling_overlap_seconds: float = 1.0
+    endpoint_hangover_ms: int = 700
+    endpoint_max_utterance_seconds: float = 15.0
+    realtime_url: str = "wss://api.openai.com/v1/realtime?intent=transcription"
+    realtime_model: str = "gpt-4o-transcribe"
     output_device_index: int | None = None
+    # Loopback/virtual input carrying the other side of the call (BlackHole,
+    # PulseAudio monitor). When set, only it feeds transcription and suggestions.
+    loopback_device_index: int | None = None
+    # Shared capture stream
+    capture_always_on: bool = True
+    capture_buffer_seconds: int = 120
+    ptt_preroll_seconds: float = 1.0
+    # Session archive: stream the interviewer source to disk for replay
+    archive_enabled: bool = False
+    archive_dir: str = ""
+    # Upload encoding for transcription: wav, wav_8k, wav_ulaw, flac, opus
+    upload_codec: str = "flac"
+    # Transcripts kept per audio fingerprint (identical audio skips the API)
+    transcript_cache_size: int = 128
+    # Suggestions kept per (transcript, style, model); entries expire after the TTL
+    suggest_cache_size: int = 64
+    suggest_cache_ttl_seconds: float = 600.0
+    # Plain-text resume included in the shared system prompt
+    resume_file: str = ""
+    # Conversation memory: the last context_turns questions go into each
+    # prompt verbatim, older ones as a rolling summary; 0 turns disables it
+    context_turns: int = 4
+    context_max_tokens: int = 600
+    # Shared rate budget, "model=rpm/tpm,..." (empty: unlimited). Rolling
+    # requests leave rate_reserve of each budget for manual ones and are
+    # dropped after waiting rolling_max_wait_seconds
+    rate_limits: str = ""
+    rate_reserve: float = 0.25
+    rolling_max_wait_seconds: float = 2.0
+    # Streaming mode: start suggestions from partial transcripts that look
+    # like questions; restart when the words drift below this similarity
+    speculative_suggestions: bool = False
+    speculate_similarity: float = 0.8
+    # HTTP transport for API calls; base URL of another OpenAI-compatible
+    # server (e.g. mock_server), None for the official API
+    openai_base_url: str | None = None
+    api_connect_timeout: float = 5.0
+    api_read_timeout: float = 30.0
+    # Ping pooled connections this often (seconds) so they stay open; 0 = pre-warm only
+    api_keepalive_seconds: float = 25.0
+    # Request policy: per-stage deadlines (suggestions: to first token),
+    # retries, hedging after the p90 latency (0 disables) and failover
+    transcribe_deadline_seconds: float = 12.0
+    suggest_deadline_seconds: float = 8.0
+    api_max_retries: int = 2
+    hedge_percentile: float = 0.9
+    transcribe_fallback_model: str = ""
+    suggest_fallback_model: str = ""
+    breaker_failures: int = 3
+    breaker_reset_seconds: float = 30.0
+    # Voice activity gating for rolling mode
+    vad_enabled: bool = True
+    vad_energy_db: float = -50.0
+    vad_snr_db: float = 10.0
+    vad_min_speech_ratio: float = 0.1
 
 
 def _env_bool(name: str, default: bool) -> bool:
@@ -78,6 +148,14 @@ def load_config() -> AppConfig:
         capture_seconds=int(os.getenv("CAPTURE_SECONDS", "10")),
         sample_rate=int(os.getenv("SAMPLE_RATE", "16000")),
     )
+    cfg.transcribe_backend = os.getenv("TRANSCRIBE_BACKEND", "openai").strip().lower() or "openai"
+    cfg.local_model = os.getenv("LOCAL_MODEL", "base.en").strip() or "base.en"
+    # Shorthand: TRANSCRIBE_MODEL=local:tiny.en
+    if cfg.transcribe_model.startswith("local:"):
+        cfg.transcribe_backend = "local"
+        cfg.local_model = cfg.transcribe_model.split(":", 1)[1] or cfg.local_model
+    cfg.local_compute_type = os.getenv("LOCAL_COMPUTE_TYPE", "int8").strip() or "int8"
+    cfg.local_cpu_threads = int(os.getenv("LOCAL_CPU_THREADS", "0"))
     # Global hotkeys (comma-separated), e.g.: <cmd>+<shift>+s,<ctrl>+<shift>+s
     hotkeys_env = os.getenv("GLOBAL_HOTKEYS", "<cmd>+<shift>+s,<ctrl>+<shift>+s")
     cfg.global_hotkeys = [h.strip() for h in hotkeys_env.split(",") if h.strip()]
@@ -94,6 +172,12 @@ def load_config() -> AppConfig:
     cfg.rolling_step_seconds = int(os.getenv("ROLLING_STEP_SECONDS", "2"))
     cfg.rolling_min_suggest_gap = int(os.getenv("ROLLING_MIN_SUGGEST_GAP", "6"))
     cfg.rolling_question_only = _env_bool("ROLLING_QUESTION_ONLY", True)
+    cfg.rolling_mode = os.getenv("ROLLING_MODE", "window").strip().lower() or "window"
+    cfg.rolling_overlap_seconds = float(os.getenv("ROLLING_OVERLAP_SECONDS", "1.0"))
+    cfg.endpoint_hangover_ms = int(os.getenv("ENDPOINT_HANGOVER_MS", "700"))
+    cfg.endpoint_max_utterance_seconds = float(os.getenv("ENDPOINT_MAX_UTTERANCE_SECONDS", "15"))
+    cfg.realtime_url = os.getenv("REALTIME_URL", cfg.realtime_url).strip() or cfg.realtime_url
+    cfg.realtime_model = os.getenv("REALTIME_MODEL", cfg.realtime_model).strip() or cfg.realtime_model
     try:
         idev = os.getenv("INPUT_DEVICE_INDEX", "").strip()
         cfg.input_device_index = int(idev) if idev else None
@@ -104,6 +188,44 @@ def load_config() -> AppConfig:
         cfg.output_device_index = int(odev) if odev else None
     except Exception:
         cfg.output_device_index = None
+    try:
+        ldev = os.getenv("LOOPBACK_DEVICE_INDEX", "").strip()
+        cfg.loopback_device_index = int(ldev) if ldev else None
+    except Exception:
+        cfg.loopback_device_index = None
+    cfg.capture_always_on = _env_bool("CAPTURE_ALWAYS_ON", True)
+    cfg.capture_buffer_seconds = int(os.getenv("CAPTURE_BUFFER_SECONDS", "120"))
+    cfg.ptt_preroll_seconds = float(os.getenv("PTT_PREROLL_SECONDS", "1.0"))
+    cfg.archive_enabled = _env_bool("ARCHIVE_ENABLED", False)
+    cfg.archive_dir = os.getenv("ARCHIVE_DIR", "").strip() or str(_default_env_dir() / "sessions")
+    cfg.upload_codec = os.getenv("UPLOAD_CODEC", "flac").strip().lower() or "flac"
+    cfg.transcript_cache_size = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "128"))
+    cfg.suggest_cache_size = int(os.getenv("SUGGEST_CACHE_SIZE", "64"))
+    cfg.suggest_cache_ttl_seconds = float(os.getenv("SUGGEST_CACHE_TTL_SECONDS", "600"))
+    cfg.resume_file = os.getenv("RESUME_FILE", "").strip()
+    cfg.context_turns = int(os.getenv("CONTEXT_TURNS", "4"))
+    cfg.context_max_tokens = int(os.getenv("CONTEXT_MAX_TOKENS", "600"))
+    cfg.rate_limits = os.getenv("RATE_LIMITS", "").strip()
+    cfg.rate_reserve = float(os.getenv("RATE_RESERVE", "0.25"))
+    cfg.rolling_max_wait_seconds = float(os.getenv("ROLLING_MAX_WAIT_SECONDS", "2"))
+    cfg.speculative_suggestions = _env_bool("SPECULATIVE_SUGGESTIONS", False)
+    cfg.speculate_similarity = float(os.getenv("SPECULATE_SIMILARITY", "0.8"))
+    cfg.openai_base_url = os.getenv("OPENAI_BASE_URL", "").strip() or None
+    cfg.api_connect_timeout = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+    cfg.api_read_timeout = float(os.getenv("API_READ_TIMEOUT", "30"))
+    cfg.api_keepalive_seconds = float(os.getenv("API_KEEPALIVE_SECONDS", "25"))
+    cfg.transcribe_deadline_seconds = float(os.getenv("TRANSCRIBE_DEADLINE_SECONDS", "12"))
+    cfg.suggest_deadline_seconds = float(os.getenv("SUGGEST_DEADLINE_SECONDS", "8"))
+    cfg.api_max_retries = int(os.getenv("API_MAX_RETRIES", "2"))
+    cfg.hedge_percentile = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+    cfg.transcribe_fallback_model = os.getenv("TRANSCRIBE_FALLBACK_MODEL", "").strip()
+    cfg.suggest_fallback_model = os.getenv("SUGGEST_FALLBACK_MODEL", "").strip()
+    cfg.breaker_failures = int(os.getenv("BREAKER_FAILURES", "3"))
+    cfg.breaker_reset_seconds = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    cfg.vad_enabled = _env_bool("VAD_ENABLED", True)
+    cfg.vad_energy_db = float(os.getenv("VAD_ENERGY_DB", "-50"))
+    cfg.vad_snr_db = float(os.getenv("VAD_SNR_DB", "10"))
+    cfg.vad_min_speech_ratio = float(os.getenv("VAD_MIN_SPEECH_RATIO", "0.1"))
     return cfg
 
 
@@ -0,0 +1,63 @@
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+_ids = itertools.count(1)
+
+
+def next_job_id() -> int:
+    """Monotonic id shared by manual and rolling jobs; higher is newer."""
+    return next(_ids)
+
+
+class JobTicket:
+    """Handle passed to a job; ``superseded`` turns true once a newer job is submitted."""
+
+    def __init__(self, executor: "JobExecutor", label: str):
+        self.id = next_job_id()
+        self.label = label
+        self._executor = executor
+
+    @property
+    def superseded(self) -> bool:
+        return self.id < self._executor.latest
+
+
+class JobExecutor:
+    """Run manual jobs (capture, push-to-talk, re-run) on a bounded worker pool.
+
+    Each submission gets a new id and supersedes every older job: ones still
+    queued are cancelled outright, running ones see ``ticket.superseded`` and
+    are expected to stop at their next checkpoint. ``on_superseded`` is
+    called for jobs cancelled before they started.
+    """
+
+    def __init__(self, max_workers: int = 2, on_superseded: Callable[[JobTicket], None] | None = None):
+        self.latest = 0
+        self.on_superseded = on_superseded
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._pending: dict[int, tuple[JobTicket, Future]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[JobTicket], None], label: str = "") -> JobTicket:
+        ticket = JobTicket(self, label)
+        with self._lock:
+            self.latest = ticket.id
+            older = list(self._pending.values())
+        # Outside the lock: cancel() runs done callbacks, which take it
+        for old_ticket, old_fut in older:
+            if old_fut.cancel() and self.on_superseded:
+                self.on_superseded(old_ticket)
+        with self._lock:
+            fut = self._pool.submit(fn, ticket)
+            self._pending[ticket.id] = (ticket, fut)
+        fut.add_done_callback(lambda _f: self._forget(ticket.id))
+        return ticket
+
+    def _forget(self, tid: int):
+        with self._lock:
+            self._pending.pop(tid, None)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,441 @@
+"""Local stand-in for the OpenAI endpoints the app uses.
+
+Usage:
+    python -m interview_copilot.mock_server [--port 8765] [--transcribe-ms 350]
+        [--ttft-ms 300] [--token-ms 12] [--jitter 0.35] [--error-rate 0.0]
+        [--realtime-port 8766]
+
+Serves ``/v1/audio/transcriptions`` (json and verbose_json with word
+timestamps), ``/v1/chat/completions`` (plain and streamed, with usage)
+and ``/v1/models/{id}``. Latencies are drawn from a log-normal around the
+given medians; ``--error-rate`` answers that share of requests with
+``--error-status`` instead. Point the app or the benchmarks at it with
+OPENAI_BASE_URL=http://127.0.0.1:8765/v1 and any API key.
+
+With ``--realtime-port`` (needs ``websockets``) a transcription-only
+realtime websocket is served as well: appended audio is split into turns
+by a simple energy detector and each turn is answered with streamed
+transcript deltas and a completed event. Use it with
+REALTIME_URL=ws://127.0.0.1:8766/v1/realtime?intent=transcription.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+QUESTIONS = [
+    "Can you tell me about a project you led from start to finish?",
+    "How do you handle disagreements with your manager?",
+    "What would you do differently if you started that system again?",
+    "Why are you interested in this role?",
+    "Walk me through how you would design a rate limiter.",
+]
+
+ANSWER = (
+    "1) I led the migration of our billing service, owning the plan, rollout and on-call handover.\n"
+    "2) The hardest part was keeping two systems consistent, so we ran them side by side for a month.\n"
+    "3) It cut invoice errors by 40% and gave the team a template for later migrations."
+)
+
+
+@dataclass
+class MockSettings:
+    # Median latencies (ms); each draw is log-normal with sigma ``jitter``
+    transcribe_ms: float = 350.0
+    ttft_ms: float = 300.0
+    token_ms: float = 12.0
+    jitter: float = 0.35
+    # Share of requests answered with ``error_status`` after a short delay
+    error_rate: float = 0.0
+    error_status: int = 500
+    # Prompt tokens reported as served from the prefix cache (OpenAI caches
+    # in 128-token steps once a prompt reaches 1024 tokens)
+    cache_prefix: bool = True
+    seed: int | None = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    # Helpers
+    def _sleep_ms(self, median: float):
+        if median > 0:
+            time.sleep(self.server.mock.draw(median) / 1000)
+
+    def _json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail_maybe(self) -> bool:
+        status = self.server.mock.injected_error()
+        if not status:
+            return False
+        self._sleep_ms(50)
+        self._json(status, {"error": {"message": "injected failure", "type": "mock_error", "code": status}})
+        return True
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    # Routes
+    def do_GET(self):
+        if self.path.startswith("/v1/models/"):
+            model = self.path.rsplit("/", 1)[-1]
+            self._json(200, {"id": model, "object": "model", "created": 0, "owned_by": "mock"})
+        else:
+            self._json(404, {"error": {"message": f"no route {self.path}"}})
+
+    def do_POST(self):
+        body = self._body()
+        if self.path.startswith("/v1/audio/transcriptions"):
+            self._transcription(body)
+        elif self.path.startswith("/v1/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        else:
+            self._json(404, {"error": {"message": f"no route {self.path}"}})
+
+    def _transcription(self, body: bytes):
+        mock = self.server.mock
+        mock.count("transcriptions")
+        if self._fail_maybe():
+            return
+        fields = _form_fields(self.headers.get("Content-Type", ""), body)
+        self._sleep_ms(mock.settings.transcribe_ms)
+        text = mock.next_question()
+        if fields.get("response_format") != "verbose_json":
+            self._json(200, {"text": text})
+            return
+        words, t = [], 0.0
+        for w in text.split():
+            words.append({"word": w, "start": round(t, 2), "end": round(t + 0.3, 2)})
+            t += 0.35
+        self._json(200, {"text": text, "language": "english", "duration": round(t, 2), "words": words})
+
+    def _chat(self, req: dict):
+        mock = self.server.mock
+        mock.count("chat")
+        if self._fail_maybe():
+            return
+        model = req.get("model", "mock")
+        prompt = sum(len(str(m.get("content", ""))) for m in req.get("messages", [])) // 4
+        pieces = [p + " " for p in ANSWER.split(" ")]
+        usage = mock.usage(req.get("messages", []), prompt, len(pieces))
+        self._sleep_ms(mock.settings.ttft_ms)
+        if not req.get("stream"):
+            for _ in pieces:
+                self._sleep_ms(mock.settings.token_ms)
+            self._json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    self._sleep_ms(mock.settings.token_ms)
+                self._event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (req.get("stream_options") or {}).get("include_usage"):
+                self._event({**base, "choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled (e.g. a hedge that lost or a superseded job)
+            mock.count("cancelled")
+
+    def _event(self, payload: dict):
+        self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+        self.wfile.flush()
+
+
+def _form_fields(content_type: str, body: bytes) -> dict[str, str]:
+    """Plain (non-file) fields of a multipart/form-data body."""
+    if "multipart/form-data" not in content_type:
+        return {}
+    msg = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    fields = {}
+    for part in msg.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name and not part.get_filename():
+            fields[name] = part.get_content().strip()
+    return fields
+
+
+class _RealtimeSession:
+    """One realtime websocket connection: server-side turn detection and transcripts."""
+
+    RATE = 24000
+    FRAME = 480  # 20 ms at 24 kHz
+    # int16 RMS that counts as speech (about -40 dBFS)
+    SPEECH_RMS = 330.0
+    MIN_SPEECH_MS = 200
+
+    def __init__(self, mock: "MockOpenAIServer", ws):
+        self.mock = mock
+        self.ws = ws
+        self.silence_ms = 500
+        self._speech_ms = 0
+        self._quiet_ms = 0
+        self._turns = 0
+        self._tail = np.zeros(0, dtype=np.int16)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self):
+        try:
+            async for raw in self.ws:
+                try:
+                    event = json.loads(raw)
+                except ValueError:
+                    continue
+                kind = event.get("type")
+                if kind == "transcription_session.update":
+                    session = event.get("session") or {}
+                    detect = session.get("turn_detection") or {}
+                    self.silence_ms = detect.get("silence_duration_ms", self.silence_ms)
+                    await self._send({"type": "transcription_session.updated", "session": session})
+                elif kind == "input_audio_buffer.append":
+                    self._append(base64.b64decode(event.get("audio") or ""))
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    def _append(self, raw: bytes):
+        pcm = np.concatenate((self._tail, np.frombuffer(raw, dtype="<i2")))
+        n = len(pcm) // self.FRAME * self.FRAME
+        self._tail = pcm[n:]
+        frame_ms = self.FRAME * 1000 // self.RATE
+        for frame in pcm[:n].reshape(-1, self.FRAME).astype(np.float32):
+            if np.sqrt(np.mean(frame * frame)) >= self.SPEECH_RMS:
+                self._speech_ms += frame_ms
+                self._quiet_ms = 0
+            elif self._speech_ms:
+                self._quiet_ms += frame_ms
+            if self._speech_ms >= self.MIN_SPEECH_MS and self._quiet_ms >= self.silence_ms:
+                self._speech_ms = self._quiet_ms = 0
+                self._turns += 1
+                # Keep reading audio while the turn is transcribed
+                task = asyncio.ensure_future(self._transcribe(f"item_{self._turns}"))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _transcribe(self, item: str):
+        mock = self.mock
+        mock.count("realtime_turns")
+        await asyncio.sleep(mock.draw(mock.settings.transcribe_ms) / 1000)
+        if mock.injected_error():
+            await self._send({"type": "error", "error": {"type": "mock_error", "message": "injected failure"}})
+            return
+        text = mock.next_question()
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                await asyncio.sleep(mock.draw(mock.settings.token_ms) / 1000)
+            await self._send({
+                "type": "conversation.item.input_audio_transcription.delta",
+                "item_id": item,
+                "content_index": 0,
+                "delta": (" " if i else "") + word,
+            })
+        await self._send({
+            "type": "conversation.item.input_audio_transcription.completed",
+            "item_id": item,
+            "content_index": 0,
+            "transcript": text,
+        })
+
+    async def _send(self, event: dict):
+        await self.ws.send(json.dumps(event))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockOpenAIServer"
+
+
+class MockOpenAIServer:
+    """Run the mock on a background thread; ``port=0`` picks a free port.
+
+    ``realtime_port`` (0 picks one) also serves the realtime websocket on
+    its own event loop thread; None leaves it off.
+    """
+
+    def __init__(
+        self,
+        settings: MockSettings | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        realtime_port: int | None = None,
+    ):
+        self.settings = settings or MockSettings()
+        self.counts: dict[str, int] = {}
+        self._rng = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        self._turn = 0
+        self._prefixes: set[int] = set()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread: threading.Thread | None = None
+        self._realtime_port = realtime_port
+        self._ws_loop: asyncio.AbstractEventLoop | None = None
+        self._ws_server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def realtime_url(self) -> str | None:
+        if self._ws_server is None:
+            return None
+        host, port = next(iter(self._ws_server.sockets)).getsockname()[:2]
+        return f"ws://{host}:{port}/v1/realtime?intent=transcription"
+
+    def start(self) -> "MockOpenAIServer":
+        self._start_realtime()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        loop, server = self._ws_loop, self._ws_server
+        if loop and server:
+            async def close():
+                server.close()
+                await server.wait_closed()
+
+            try:
+                asyncio.run_coroutine_threadsafe(close(), loop).result(5)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+
+    def serve_forever(self):
+        self._start_realtime()
+        self._httpd.serve_forever()
+
+    def _start_realtime(self):
+        if self._realtime_port is None or self._ws_loop is not None:
+            return
+        import websockets
+
+        async def handler(ws, *args):
+            # websockets < 13 also passes the request path
+            self.count("realtime")
+            await _RealtimeSession(self, ws).run()
+
+        async def listen():
+            return await websockets.serve(handler, self._httpd.server_address[0], self._realtime_port, max_size=None)
+
+        loop = asyncio.new_event_loop()
+        self._ws_server = loop.run_until_complete(listen())
+        self._ws_loop = loop
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def draw(self, median: float) -> float:
+        with self._lock:
+            return median * self._rng.lognormvariate(0.0, self.settings.jitter) if self.settings.jitter else median
+
+    def injected_error(self) -> int:
+        with self._lock:
+            failed = self._rng.random() < self.settings.error_rate
+        if failed:
+            self.count("errors")
+        return self.settings.error_status if failed else 0
+
+    def count(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def next_question(self) -> str:
+        with self._lock:
+            self._turn += 1
+            return QUESTIONS[(self._turn - 1) % len(QUESTIONS)]
+
+    def usage(self, messages: list[dict], prompt_tokens: int, completion_tokens: int) -> dict:
+        """Usage block; a repeated system prompt counts as a prefix-cache hit."""
+        system = next((str(m.get("content", "")) for m in messages if m.get("role") == "system"), "")
+        cached = 0
+        if self.settings.cache_prefix and prompt_tokens >= 1024:
+            key = hash(system)
+            with self._lock:
+                seen = key in self._prefixes
+                self._prefixes.add(key)
+            if seen:
+                cached = min(len(system) // 4, prompt_tokens) // 128 * 128
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--transcribe-ms", type=float, default=350.0, help="median transcription latency")
+    ap.add_argument("--ttft-ms", type=float, default=300.0, help="median time to the first chat token")
+    ap.add_argument("--token-ms", type=float, default=12.0, help="median gap between streamed tokens")
+    ap.add_argument("--jitter", type=float, default=0.35, help="log-normal sigma (0: fixed latencies)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    ap.add_argument("--error-status", type=int, default=500, help="HTTP status for injected failures")
+    ap.add_argument("--seed", type=int, help="random seed for repeatable runs")
+    ap.add_argument("--realtime-port", type=int, help="also serve the realtime websocket here")
+    args = ap.parse_args(argv)
+
+    settings = MockSettings(
+        transcribe_ms=args.transcribe_ms,
+        ttft_ms=args.ttft_ms,
+        token_ms=args.token_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    server = MockOpenAIServer(settings, args.host, args.port, args.realtime_port)
+    print(f"mock OpenAI API on {server.base_url}", file=sys.stderr)
+    try:
+        if args.realtime_port is not None:
+            server._start_realtime()
+            print(f"mock realtime on {server.realtime_url}", file=sys.stderr)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,112 @@
 import os
-from typing import Optional
+import threading
+import time
+from typing import AsyncIterator, BinaryIO, Callable, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
+# Keep idle connections longer than the keep-alive ping interval so the pool
+# survives the gaps between questions
+_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=120.0)
 
-def make_client(api_key: str) -> OpenAI:
-    return OpenAI(api_key=api_key)
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except Exception:
+        return False
 
-def transcribe_file(client: OpenAI, file_path: str, model: str = "whisper-1") -> str:
-    with open(file_path, "rb") as f:
-        resp = client.audio.transcriptions.create(model=model, file=f)
+
+def _timeout(connect_timeout: float, read_timeout: float) -> httpx.Timeout:
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+
+def make_client(
+    api_key: str,
+    connect_timeout: float = 5.0,
+    read_timeout: float = 30.0,
+    max_connections: int | None = None,
+    base_url: str | None = None,
+) -> OpenAI:
+    """Client on a pooled keep-alive transport (HTTP/2 when ``h2`` is installed).
+
+    ``base_url`` points it at another OpenAI-compatible server (such as
+    :mod:`.mock_server`); by default the SDK reads OPENAI_BASE_URL.
+    """
+    limits = _LIMITS
+    if max_connections and max_connections > _LIMITS.max_connections:
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=120.0
+        )
+    http = httpx.Client(http2=_http2_available(), limits=limits, timeout=_timeout(connect_timeout, read_timeout))
+    return OpenAI(
+        api_key=api_key, base_url=base_url, http_client=http, timeout=_timeout(connect_timeout, read_timeout)
+    )
+
+
+# Explicit types for the formats we upload; mimetypes is patchy for audio
+_AUDIO_MIME = {
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".mp3": "audio/mpeg",
+    ".webm": "audio/webm",
+}
+
+
+def _upload_file(buf: BinaryIO) -> tuple[str, BinaryIO, str]:
+    name = os.path.basename(getattr(buf, "name", "") or "audio.wav")
+    mime = _AUDIO_MIME.get(os.path.splitext(name)[1].lower(), "application/octet-stream")
+    return (name, buf, mime)
+
+
+def transcribe_buffer(client: OpenAI, buf: BinaryIO, model: str = "whisper-1") -> str:
+    """Transcribe an in-memory (or open) audio file without touching disk.
+
+    The upload filename and MIME type come from ``buf.name``.
+    """
+    resp = client.audio.transcriptions.create(model=model, file=_upload_file(buf))
     # SDK returns a typed object with .text
     return getattr(resp, "text", "").strip()
 
 
+def transcribe_words(
+    client: OpenAI, buf: BinaryIO, model: str = "whisper-1"
+) -> tuple[str, list[tuple[str, float, float]]]:
+    """Transcribe and return ``(text, [(word, start, end), ...])``.
+
+    Times are seconds from the start of ``buf``. Only whisper-1 reports
+    word timestamps; other models return an empty word list.
+    """
+    if model != "whisper-1":
+        return transcribe_buffer(client, buf, model=model), []
+    resp = client.audio.transcriptions.create(
+        model=model,
+        file=_upload_file(buf),
+        response_format="verbose_json",
+        timestamp_granularities=["word"],
+    )
+    words = [
+        (w.word, float(w.start), float(w.end))
+        for w in (getattr(resp, "words", None) or [])
+    ]
+    return getattr(resp, "text", "").strip(), words
+
+
+def _usage_options(on_usage) -> dict:
+    # Streams only report usage, in a final chunk without choices, when asked
+    return {"stream_options": {"include_usage": True}} if on_usage else {}
+
+
 def chat_complete(
     client: OpenAI,
     model: str,
     system_prompt: str,
     user_prompt: str,
     temperature: float = 0.3,
+    on_usage: Optional[Callable[[object], None]] = None,
 ) -> str:
     resp = client.chat.completions.create(
         model=model,
@@ -30,7 +116,115 @@ def chat_complete(
             {"role": "user", "content": user_prompt},
         ],
     )
+    if on_usage:
+        on_usage(getattr(resp, "usage", None))
     if resp.choices and resp.choices[0].message and resp.choices[0].message.content:
         return resp.choices[0].message.content.strip()
     return ""
 
+
+def make_async_client(
+    api_key: str, connect_timeout: float = 5.0, read_timeout: float = 30.0, base_url: str | None = None
+) -> AsyncOpenAI:
+    """Async counterpart of :func:`make_client`; use it from a single event loop."""
+    http = httpx.AsyncClient(
+        http2=_http2_available(), limits=_LIMITS, timeout=_timeout(connect_timeout, read_timeout)
+    )
+    return AsyncOpenAI(
+        api_key=api_key, base_url=base_url, http_client=http, timeout=_timeout(connect_timeout, read_timeout)
+    )
+
+
+async def achat_complete_stream(
+    client: AsyncOpenAI,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float = 0.3,
+    on_usage: Optional[Callable[[object], None]] = None,
+) -> AsyncIterator[str]:
+    """Like :func:`chat_complete` but yield content deltas as they arrive.
+
+    With ``on_usage`` the final chunk's token usage is requested and passed to it.
+    """
+    stream = await client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        stream=True,
+        **_usage_options(on_usage),
+    )
+    try:
+        async for chunk in stream:
+            if on_usage and getattr(chunk, "usage", None):
+                on_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+
+
+def warm_connection(client: OpenAI, model: str) -> float:
+    """Open (or keep alive) a pooled connection with a tiny request; return its ms.
+
+    Errors such as an unknown model still leave a connected socket behind,
+    so they are ignored.
+    """
+    t0 = time.perf_counter()
+    try:
+        client.with_options(max_retries=0).models.retrieve(model)
+    except Exception:
+        pass
+    return (time.perf_counter() - t0) * 1000
+
+
+async def awarm_connection(client: AsyncOpenAI, model: str) -> float:
+    """Async counterpart of :func:`warm_connection`."""
+    t0 = time.perf_counter()
+    try:
+        await client.with_options(max_retries=0).models.retrieve(model)
+    except Exception:
+        pass
+    return (time.perf_counter() - t0) * 1000
+
+
+class ConnectionWarmer:
+    """Pre-warm API connections in the background, then ping them periodically.
+
+    Each target is a blocking callable that touches one client's pool. They
+    run once as soon as the warmer starts (DNS and TLS are paid before the
+    first question) and again every ``interval`` seconds so idle gaps do not
+    let the server close the connections. ``interval`` 0 only pre-warms.
+    """
+
+    def __init__(self, targets: list[Callable[[], object]], interval: float = 25.0, on_warm: Callable[[float], None] | None = None):
+        self.targets = targets
+        self.interval = interval
+        self.on_warm = on_warm
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        first = True
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            for target in self.targets:
+                try:
+                    target()
+                except Exception:
+                    pass
+            if first and self.on_warm:
+                self.on_warm((time.perf_counter() - t0) * 1000)
+            first = False
+            if self.interval <= 0 or self._stop.wait(self.interval):
+                return
@@ -0,0 +1,493 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import AsyncIterator, Callable, Optional
+
+from .cache import LRUCache, SingleFlight
+from .jobs import next_job_id
+from .openai_client import achat_complete_stream, awarm_connection
+from .policy import RequestPolicy
+from .scheduler import MANUAL, ROLLING, RequestScheduler
+from .tokens import TokenMeter, TokenUsage, count_tokens
+from .transcript import normalize_text
+
+Emit = Callable[[str, object], None]
+
+
+@dataclass
+class Job:
+    text: str
+    # "rolling" jobs go through classification; "manual" ones (button,
+    # hotkey, push-to-talk) always get suggestions and take priority
+    source: str = ROLLING
+    created: float = field(default_factory=time.perf_counter)
+    # Higher ids are newer; manual jobs keep the id their capture started with
+    id: int = field(default_factory=next_job_id)
+
+
+def _merge(older: Job, newer: Job) -> Job:
+    """Fold two rolling questions into one job, dropping words they share at the seam."""
+    a, b = normalize_text(older.text).split(), normalize_text(newer.text).split()
+    if " ".join(a) in " ".join(b):
+        return newer
+    overlap = next((k for k in range(min(len(a), len(b)), 0, -1) if a[-k:] == b[:k]), 0)
+    words = newer.text.split()
+    # Raw and normalized words only line up when no token is pure punctuation
+    tail = words[overlap:] if len(words) == len(b) else b[overlap:]
+    return Job(" ".join([older.text.strip()] + tail), ROLLING, created=older.created, id=newer.id)
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    cancelled: int = 0
+    committed: int = 0
+
+
+class _Speculation:
+    """A suggestion request started from a partial transcript.
+
+    Deltas are buffered until the final transcript commits (or drops) it.
+    """
+
+    def __init__(self, text: str):
+        self.words = normalize_text(text).split()
+        self.model: str | None = None
+        self.task: asyncio.Task | None = None
+        self.deltas: asyncio.Queue = asyncio.Queue()
+
+    async def stream(self) -> AsyncIterator[str]:
+        while True:
+            item = await self.deltas.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+class SuggestionPipeline:
+    """Transcription, classification and suggestion as concurrent asyncio stages.
+
+    The event loop runs on its own thread. The transcription stage calls a
+    blocking ``produce()`` (which pulls audio from the capture engine and
+    transcribes it) on a dedicated worker thread every ``interval`` seconds;
+    transcripts flow through bounded queues to the classification stage
+    (``classify(text) -> bool``) and on to the suggestion stage, which
+    streams completions from an ``AsyncOpenAI`` client under ``policy``
+    (deadline to first token, hedging, retries, failover). Because the stages
+    only meet at the queues, the next window is transcribed while the
+    previous suggestion is still streaming. Newer jobs win: when a queue is
+    full the oldest job is dropped, a job reaching the suggestion stage
+    cancels the suggestion still streaming for an older one, and a job that
+    arrives after a newer one has started is discarded, so the UI only ever
+    shows the newest result. Manual jobs rank above rolling ones: rolling
+    work never displaces or cancels a manual job and is what gets dropped
+    under backpressure, and a burst of rolling questions is merged into one
+    suggestion call. With a ``scheduler`` every request first takes budget
+    from its per-model rate limits at the job's priority.
+
+    Finished suggestions are cached (LRU with TTL) by normalized transcript,
+    system prompt (i.e. style), model and temperature, and identical
+    requests that overlap share one in-flight call: a job whose key matches
+    the one already streaming attaches to it instead of cancelling it.
+
+    With speculation, :meth:`speculate` starts a request from a partial
+    transcript that already looks like a question. It keeps running while
+    the partial grows and is restarted only when the text drifts below
+    ``speculate_similarity`` (word-level ratio). When the final transcript
+    arrives, a matching speculation is committed: its buffered output is
+    rendered at once and the rest streams live.
+
+    Everything is reported through ``emit(kind, payload)``, which the app
+    wires to its Tk event queue.
+    """
+
+    def __init__(
+        self,
+        aclient,
+        model: str,
+        emit: Emit,
+        classify: Callable[[str], bool],
+        build_prompts: Callable[[str], tuple[str, str]],
+        queue_size: int = 2,
+        flush_seconds: float = 0.08,
+        policy: RequestPolicy | None = None,
+        cache: LRUCache | None = None,
+        temperature: float = 0.3,
+        speculate_similarity: float = 0.8,
+        scheduler: RequestScheduler | None = None,
+        output_tokens: int = 400,
+    ):
+        self.aclient = aclient
+        self.policy = policy or RequestPolicy()
+        self.model = model
+        self.emit = emit
+        self.classify = classify
+        self.build_prompts = build_prompts
+        self.queue_size = queue_size
+        self.flush_seconds = flush_seconds
+        self.temperature = temperature
+        self.cache = cache or LRUCache(64, ttl=600)
+        self.flight = SingleFlight()
+        self.speculate_similarity = speculate_similarity
+        self.scheduler = scheduler
+        # Budgeted per request on top of the prompt estimate
+        self.output_tokens = output_tokens
+        self.spec_stats = SpeculationStats()
+        # Prompt/cached/completion tokens as reported by the API
+        self.tokens = TokenMeter()
+        self._spec: _Speculation | None = None
+        self._newest = 0
+        self._newest_manual = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread: Optional[threading.Thread] = None
+        # One worker keeps produce() calls ordered; rolling state is not thread-safe
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcribe")
+        self._source_task: Optional[asyncio.Task] = None
+        self._text_q: Optional[asyncio.Queue] = None
+        self._suggest_q: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+
+    # Thread-safe API
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        if self._thread and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._shutdown)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def set_source(self, produce: Callable[[], Optional[str]] | None, interval: float = 1.0):
+        """Start feeding the pipeline from ``produce`` (None detaches the current source)."""
+        self._loop.call_soon_threadsafe(self._set_source, produce, interval)
+
+    def warm(self, timeout: float = 15.0) -> float:
+        """Blocking: warm the async client's pool on the pipeline loop."""
+        fut = asyncio.run_coroutine_threadsafe(awarm_connection(self.aclient, self.model), self._loop)
+        return fut.result(timeout)
+
+    def speculate(self, text: str):
+        """Start (or keep) a speculative suggestion for a partial transcript."""
+        self._loop.call_soon_threadsafe(self._speculate, text)
+
+    def submit(self, text: str, source: str = MANUAL, job_id: int | None = None):
+        """Queue an already transcribed ``text`` for classification and suggestions."""
+        job = Job(text, source) if job_id is None else Job(text, source, id=job_id)
+        self._loop.call_soon_threadsafe(self._offer, self._text_q, job)
+
+    # Loop internals
+    def _run(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._text_q = asyncio.Queue(self.queue_size)
+        self._suggest_q = asyncio.Queue(1)
+        self._tasks = [
+            self._loop.create_task(self._classify_stage()),
+            self._loop.create_task(self._suggest_stage()),
+        ]
+        ready.set()
+        try:
+            self._loop.run_forever()
+            # Let cancelled stages unwind before closing the loop
+            pending = [t for t in asyncio.all_tasks(self._loop) if not t.done()]
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        finally:
+            self._loop.close()
+
+    def _shutdown(self):
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+        self._loop.stop()
+
+    def _superseded(self, job: Job):
+        if job.source == MANUAL:
+            self.emit("superseded", None)
+
+    def _offer(self, q: asyncio.Queue, job: Job):
+        if q.full():
+            queued = q.get_nowait()
+            if queued.source == MANUAL and job.source == ROLLING:
+                # Background work never displaces a user request
+                q.put_nowait(queued)
+                self.emit("status", "Rolling: busy, skipped a question")
+                return
+            if queued.source == ROLLING and job.source == ROLLING and q is self._suggest_q:
+                job = _merge(queued, job)
+            else:
+                self._superseded(queued)
+        q.put_nowait(job)
+
+    def _set_source(self, produce, interval: float):
+        if self._source_task:
+            self._source_task.cancel()
+            self._source_task = None
+        if produce:
+            self._source_task = self._loop.create_task(self._transcribe_stage(produce, interval))
+
+    async def _transcribe_stage(self, produce, interval: float):
+        while True:
+            try:
+                text = await self._loop.run_in_executor(self._executor, produce)
+                if text is not None:
+                    self._offer(self._text_q, Job(text))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.emit("status", f"Rolling error: {e}")
+            await asyncio.sleep(interval)
+
+    async def _classify_stage(self):
+        while True:
+            job = await self._text_q.get()
+            try:
+                if job.source == MANUAL or self.classify(job.text):
+                    self._offer(self._suggest_q, job)
+                else:
+                    # The utterance ended without becoming a question
+                    self._drop_speculation()
+            except Exception as e:
+                self.emit("status", f"Rolling error: {e}")
+
+    async def _suggest_stage(self):
+        # The running job, its tasks (the first plus identical jobs attached
+        # to it) and its cache key
+        current: tuple[Job, list[asyncio.Task], tuple] | None = None
+        while True:
+            job = await self._suggest_q.get()
+            # Transcribed after a newer job had started; its answer would be
+            # stale. Only a newer manual job makes a manual one stale.
+            if job.id < (self._newest_manual if job.source == MANUAL else self._newest):
+                self._superseded(job)
+                continue
+            running = current if current and not all(t.done() for t in current[1]) else None
+            if running and job.source == ROLLING and running[0].source == MANUAL:
+                self.emit("status", "Rolling: skipped a question during a manual request")
+                continue
+            self._newest = max(self._newest, job.id)
+            if job.source == MANUAL:
+                self._newest_manual = job.id
+            try:
+                prompts = self._prompts(job)
+            except Exception as e:
+                self._failed(job, e)
+                continue
+            if running and prompts[2] == running[2] and prompts[2] in self.flight:
+                # The same request is already in flight: share its answer
+                # rather than cancelling and starting it over
+                running[1].append(self._loop.create_task(self._run_job(job, prompts)))
+                continue
+            if running:
+                for task in running[1]:
+                    task.cancel()
+                if job.source == ROLLING:
+                    # A burst of questions: answer them together in one call
+                    job = _merge(running[0], job)
+                else:
+                    self._superseded(running[0])
+                # Let it unwind (and leave single-flight) before the new job looks
+                await asyncio.wait(running[1])
+                if job.source == ROLLING:
+                    try:
+                        prompts = self._prompts(job)
+                    except Exception as e:
+                        self._failed(job, e)
+                        continue
+            current = (job, [self._loop.create_task(self._run_job(job, prompts))], prompts[2])
+
+    def _prompts(self, job: Job) -> tuple[str, str, tuple]:
+        """Return ``(system, user, cache_key)`` for a job."""
+        system, user = self.build_prompts(job.text)
+        # The user prompt carries the transcript and any conversation context
+        return system, user, (normalize_text(user), system, self.model, self.temperature)
+
+    def _failed(self, job: Job, e: Exception):
+        if job.source == MANUAL:
+            self.emit("failed", f"Suggestion failed: {e}")
+        else:
+            self.emit("status", f"Rolling error: {e}")
+
+    async def _run_job(self, job: Job, prompts: tuple[str, str, tuple]):
+        try:
+            await self._suggest(job, *prompts)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed(job, e)
+
+    def cache_summary(self) -> str:
+        st = self.cache.stats
+        return f"cache {st.hits}/{st.hits + st.misses} hits, {self.flight.coalesced} coalesced"
+
+    def _similar(self, a: list[str], b: list[str]) -> bool:
+        return SequenceMatcher(None, a, b, autojunk=False).ratio() >= self.speculate_similarity
+
+    def _speculate(self, text: str):
+        spec = self._spec
+        if spec and self._similar(spec.words, normalize_text(text).split()):
+            return
+        self._drop_speculation()
+        spec = _Speculation(text)
+        system, user = self.build_prompts(text)
+        spec.task = self._loop.create_task(self._run_speculation(spec, system, user))
+        self._spec = spec
+        self.spec_stats.started += 1
+
+    async def _run_speculation(self, spec: _Speculation, system: str, user: str):
+        try:
+            spec.model, deltas = await self._open(system, user, ROLLING)
+            async for delta in deltas:
+                spec.deltas.put_nowait(delta)
+            spec.deltas.put_nowait(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            spec.deltas.put_nowait(e)
+
+    def _drop_speculation(self):
+        spec, self._spec = self._spec, None
+        if spec:
+            spec.task.cancel()
+            self.spec_stats.cancelled += 1
+
+    def _take_speculation(self, text: str) -> _Speculation | None:
+        """Return the running speculation if it matches the final ``text``; drop it otherwise."""
+        spec = self._spec
+        if spec and self._similar(spec.words, normalize_text(text).split()):
+            self._spec = None
+            self.spec_stats.committed += 1
+            return spec
+        self._drop_speculation()
+        return None
+
+    async def _suggest(self, job: Job, system: str, user: str, key: tuple):
+        cached = self.cache.get(key)
+        if cached is not None:
+            if job.source == ROLLING:
+                # The answer is known; a speculation for it would only be billed
+                self._drop_speculation()
+            self.emit("suggestions", cached)
+            self.emit("status", f"Suggestions from cache ({self.cache_summary()})")
+            return
+        spec = self._take_speculation(job.text) if job.source == ROLLING else None
+        if spec:
+            finished = False
+            try:
+                suggestions, ttft = await self._render(spec.stream())
+                finished = True
+            finally:
+                if not finished:
+                    # Superseded, cancelled or failed: nobody reads the stream any more
+                    spec.task.cancel()
+            self.cache.put(key, suggestions)
+            shown = f"{ttft * 1000:.0f} ms" if ttft is not None else "-"
+            via = f", fallback {spec.model}" if spec.model and spec.model != self.model else ""
+            self.emit("status", f"Done (speculative, shown {shown} after the final transcript, "
+                                f"{self.spec_stats.committed}/{self.spec_stats.started} committed{via})")
+            return
+        follower = key in self.flight
+        suggestions = await self.flight.do(key, lambda: self._generate(system, user, job.source))
+        if follower:
+            self.emit("suggestions", suggestions or "(No suggestions returned)")
+            self.emit("status", f"Shared an identical request in flight ({self.cache_summary()})")
+        elif suggestions:
+            self.cache.put(key, suggestions)
+
+    async def _open(
+        self, system: str, user: str, priority: str, usage: list[TokenUsage] | None = None
+    ) -> tuple[str, AsyncIterator[str]]:
+        """Open a completion stream under the policy; return ``(model, deltas)``.
+
+        The request's token usage is recorded in :attr:`tokens` and, when
+        given, appended to ``usage`` once the stream has been read to the end.
+        """
+        client = self.aclient.with_options(max_retries=0)
+        prompt_tokens = count_tokens(system, self.model) + count_tokens(user, self.model)
+        tokens = prompt_tokens + self.output_tokens
+
+        def on_usage(reported):
+            one = self.tokens.record(reported, prompt_tokens)
+            if usage is not None:
+                usage.append(one)
+
+        async def open_stream(model: str):
+            if self.scheduler:
+                await self.scheduler.aacquire(model, tokens, priority)
+            # The policy races and retries up to the first token; the rest streams as is
+            agen = achat_complete_stream(
+                client,
+                model=model,
+                system_prompt=system,
+                user_prompt=user,
+                temperature=self.temperature,
+                on_usage=on_usage,
+            )
+            try:
+                return model, await agen.__anext__(), agen
+            except StopAsyncIteration:
+                return model, "", None
+
+        async def discard(opened):
+            if opened[2]:
+                await opened[2].aclose()
+
+        model, first, rest = await self.policy.acall(open_stream, self.model, discard)
+        return model, self._chain(first, rest)
+
+    async def _generate(self, system: str, user: str, priority: str) -> str:
+        self.emit("status", f"Generating suggestions ({self.model})...")
+        t0 = time.perf_counter()
+        usage: list[TokenUsage] = []
+        model, deltas = await self._open(system, user, priority, usage)
+        suggestions, ttft = await self._render(deltas, t0)
+        via = f", fallback {model}" if model != self.model else ""
+        if usage and usage[0].prompt:
+            via += f", {usage[0].cached}/{usage[0].prompt} prompt tokens cached"
+        if ttft is not None:
+            self.emit("status", f"Done (first token {ttft * 1000:.0f} ms, total {time.perf_counter() - t0:.1f} s{via})")
+        else:
+            self.emit("status", f"Done (fallback {model})" if model != self.model else "Done")
+        return suggestions
+
+    async def _render(self, deltas: AsyncIterator[str], t0: float | None = None) -> tuple[str, float | None]:
+        """Stream ``deltas`` to the UI, batching into one event per ``flush_seconds``.
+
+        Returns the trimmed text and the time from ``t0`` to the first delta.
+        """
+        t0 = time.perf_counter() if t0 is None else t0
+        ttft = None
+        parts: list[str] = []
+        pending = ""
+        last_flush = t0
+        self.emit("suggest_begin", None)
+        async for delta in deltas:
+            parts.append(delta)
+            pending += delta
+            now = time.perf_counter()
+            if ttft is None:
+                ttft = now - t0
+                self.emit("status", f"Suggesting… first token {ttft * 1000:.0f} ms")
+            elif now - last_flush < self.flush_seconds:
+                continue
+            self.emit("suggest_delta", pending)
+            pending = ""
+            last_flush = now
+        suggestions = "".join(parts).strip()
+        # Final render replaces the streamed text with the trimmed whole
+        self.emit("suggestions", suggestions or "(No suggestions returned)")
+        return suggestions, ttft
+
+    @staticmethod
+    async def _chain(first: str, rest):
+        if first:
+            yield first
+        if rest:
+            async for delta in rest:
+                yield delta
@@ -0,0 +1,353 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+class Rejected(RuntimeError):
+    """Raised by an attempt that refuses locally (e.g. no rate budget left).
+
+    Never retried and not counted against the model's breaker.
+    """
+
+
+@dataclass
+class PolicyStats:
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failovers: int = 0
+    # Sync attempts given up on while still running (lost hedges, deadlines)
+    abandoned: int = 0
+
+
+class LatencyTracker:
+    """Recent successful latencies (seconds) for percentile estimates."""
+
+    def __init__(self, size: int = 50):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float | None:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Open after ``failures`` consecutive failures; let one trial through after ``reset_seconds``.
+
+    While half-open only the caller that claimed the trial is allowed; the
+    rest stay on the fallback until it is recorded. A trial that is never
+    recorded (rejected locally or cancelled) expires after another
+    ``reset_seconds``.
+    """
+
+    def __init__(self, failures: int = 3, reset_seconds: float = 30.0):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._count = 0
+        self._opened_at: float | None = None
+        self._trial_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """True when a call may go to the model; claims the trial when half-open."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            if self._trial_at is not None and now - self._trial_at < self.reset_seconds:
+                return False
+            self._trial_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+            self._trial_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._count += 1
+            if self._count >= self.failures:
+                # Also restarts the wait after a failed half-open trial
+                self._opened_at = time.monotonic()
+                self._trial_at = None
+
+
+def _retryable(exc: BaseException) -> bool:
+    """429, 5xx, timeouts and connection errors are worth another try; anything else is not."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, (TimeoutError, ConnectionError, APIConnectionError, httpx.TransportError))
+
+
+class RequestPolicy:
+    """Deadline, hedging, retries and circuit breaking around one kind of API call.
+
+    ``fn(model)`` performs a single attempt. Within the stage ``deadline``:
+
+    * if an attempt has not answered after the ``hedge_percentile`` latency
+      of recent calls, a duplicate is fired and the first to answer wins
+      (async losers are cancelled; sync losers run out on their own
+      thread, so they never hold up later calls);
+    * failed attempts are retried up to ``max_retries`` times with full
+      jitter backoff when they timed out, could not connect or got a 429
+      or 5xx; anything else (other 4xx, bugs in ``fn``) is raised at once;
+    * the breaker tracks the primary model; while it is open calls go to
+      ``fallback_model`` (or fail fast when there is none).
+    """
+
+    # No sync hedges while this many attempts are still running
+    MAX_IN_FLIGHT = 8
+
+    def __init__(
+        self,
+        deadline: float = 10.0,
+        max_retries: int = 2,
+        hedge_percentile: float = 0.9,
+        hedge_min_delay: float = 0.3,
+        min_samples: int = 5,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        breaker: CircuitBreaker | None = None,
+        fallback_model: str | None = None,
+    ):
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.min_samples = min_samples
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback_model = fallback_model or None
+        self.latency = LatencyTracker()
+        self.stats = PolicyStats()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float | None:
+        if self.hedge_percentile <= 0 or len(self.latency) < self.min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(self.hedge_percentile))
+
+    def _model_for(self, model: str) -> str:
+        if self.breaker.allow():
+            return model
+        if self.fallback_model:
+            self.stats.failovers += 1
+            return self.fallback_model
+        raise CircuitOpen(f"{model} is failing; retrying in {self.breaker.reset_seconds:.0f}s")
+
+    def _backoff(self, attempt: int, remaining: float) -> float:
+        return min(remaining, random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    def _record(self, model: str, primary: str, ok: bool, elapsed: float = 0.0):
+        if ok:
+            self.latency.add(elapsed)
+        if model != primary:
+            return
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    # Blocking calls
+    def call(self, fn: Callable[[str], T], model: str) -> T:
+        self.stats.calls += 1
+        end = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            use = self._model_for(model)
+            t0 = time.monotonic()
+            try:
+                result = self._hedged(fn, use, end)
+            except Rejected:
+                raise
+            except Exception as e:
+                self._record(use, model, False)
+                remaining = end - time.monotonic()
+                if isinstance(e, DeadlineExceeded) or attempt >= self.max_retries or remaining <= 0 or not _retryable(e):
+                    raise
+                attempt += 1
+                self.stats.retries += 1
+                time.sleep(self._backoff(attempt, remaining))
+                continue
+            self._record(use, model, True, time.monotonic() - t0)
+            return result
+
+    def _start(self, fn: Callable[[str], T], model: str) -> Future:
+        """Run one attempt on its own daemon thread.
+
+        Blocking HTTP calls cannot be cancelled. A shared pool would let
+        abandoned attempts hold its workers until the read timeout while
+        new calls queued behind them; a thread per attempt starts at once.
+        """
+        fut: Future = Future()
+        fut.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                fut.set_result(fn(model))
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        with self._lock:
+            self._in_flight += 1
+        threading.Thread(target=run, name="attempt", daemon=True).start()
+        return fut
+
+    def _hedged(self, fn: Callable[[str], T], model: str, end: float) -> T:
+        """One attempt plus an optional hedge, all finished by the absolute ``end``."""
+        first = self._start(fn, model)
+        futures = [first]
+        try:
+            delay = self.hedge_delay()
+            if delay is not None and time.monotonic() + delay < end and self._in_flight < self.MAX_IN_FLIGHT:
+                done, _ = wait(futures, timeout=delay)
+                if not done:
+                    self.stats.hedged += 1
+                    futures.append(self._start(fn, model))
+            error: BaseException | None = None
+            while futures:
+                done, _ = wait(futures, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    self.stats.timeouts += 1
+                    raise DeadlineExceeded(f"no response within {self.deadline:g}s")
+                for f in done:
+                    if f.exception() is None:
+                        if f is not first:
+                            self.stats.hedge_wins += 1
+                        return f.result()
+                    error = f.exception()
+                    futures.remove(f)
+            raise error
+        finally:
+            self.stats.abandoned += sum(1 for f in futures if not f.done())
+
+    # Async calls
+    async def acall(
+        self,
+        fn: Callable[[str], Awaitable[T]],
+        model: str,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        """Async :meth:`call`; ``discard`` releases a result that lost the hedge race."""
+        self.stats.calls += 1
+        loop = asyncio.get_running_loop()
+        end = loop.time() + self.deadline
+        attempt = 0
+        while True:
+            use = self._model_for(model)
+            t0 = loop.time()
+            try:
+                result = await self._ahedged(fn, use, end - t0, discard)
+            except (asyncio.CancelledError, Rejected):
+                raise
+            except Exception as e:
+                self._record(use, model, False)
+                remaining = end - loop.time()
+                if isinstance(e, DeadlineExceeded) or attempt >= self.max_retries or remaining <= 0 or not _retryable(e):
+                    raise
+                attempt += 1
+                self.stats.retries += 1
+                await asyncio.sleep(self._backoff(attempt, remaining))
+                continue
+            self._record(use, model, True, loop.time() - t0)
+            return result
+
+    async def _ahedged(self, fn, model: str, timeout: float, discard) -> T:
+        loop = asyncio.get_running_loop()
+        end = loop.time() + timeout
+        tasks = [asyncio.ensure_future(fn(model))]
+        winner = None
+        try:
+            delay = self.hedge_delay()
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.stats.hedged += 1
+                    tasks.append(asyncio.ensure_future(fn(model)))
+            pending = list(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(0.0, end - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.stats.timeouts += 1
+                    raise DeadlineExceeded(f"no response within {self.deadline:g}s")
+                for t in done:
+                    pending.remove(t)
+                    if t.exception() is None:
+                        winner = t
+                        if t is not tasks[0]:
+                            self.stats.hedge_wins += 1
+                        return t.result()
+                    error = t.exception()
+            raise error
+        finally:
+            for t in tasks:
+                if t is winner:
+                    continue
+                if not t.done():
+                    t.cancel()
+                elif discard and not t.cancelled() and t.exception() is None:
+                    await discard(t.result())
+
+
+def policy_from_config(cfg, deadline: float, fallback_model: str | None = None) -> RequestPolicy:
+    """Build a policy for one stage from the shared ``API_*``/``HEDGE_*``/``BREAKER_*`` settings."""
+    return RequestPolicy(
+        deadline=deadline,
+        max_retries=cfg.api_max_retries,
+        hedge_percentile=cfg.hedge_percentile,
+        breaker=CircuitBreaker(cfg.breaker_failures, cfg.breaker_reset_seconds),
+        fallback_model=fallback_model,
+    )
@@ -0,0 +1,182 @@
+import asyncio
+import base64
+import json
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from .audio import RollingMic, resample
+
+DEFAULT_URL = "wss://api.openai.com/v1/realtime?intent=transcription"
+
+
+class RealtimeTranscriber:
+    """Stream a capture source to an OpenAI-realtime-compatible websocket.
+
+    Runs its own asyncio loop on a background thread. Every ``chunk_ms`` the
+    audio captured since the last send is resampled to 24 kHz PCM16 and
+    appended to the server's input buffer; the server segments turns itself
+    (server VAD). Transcript events are reported through ``on_event`` as
+    ``("partial", text_so_far)`` and ``("final", text)``, plus
+    ``("status", message)`` for connection changes and errors. The
+    connection is re-established with backoff whenever it fails or drops;
+    the backoff only resets once a session has heard from the server.
+    """
+
+    RATE = 24000
+
+    def __init__(
+        self,
+        source: RollingMic,
+        api_key: str,
+        on_event: Callable[[str, str], None],
+        url: str = DEFAULT_URL,
+        model: str = "gpt-4o-transcribe",
+        chunk_ms: int = 100,
+    ):
+        self.source = source
+        self.api_key = api_key
+        self.on_event = on_event
+        self.url = url
+        self.model = model
+        self.chunk_ms = chunk_ms
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._partials: dict[str, str] = {}
+        # Whether the current session got any server event (resets the backoff)
+        self._received = False
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # Created here so stop() works even before the thread gets going
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        loop, stop = self._loop, self._stop
+        if loop and stop:
+            loop.call_soon_threadsafe(stop.set)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _connect(self):
+        import websockets
+
+        headers = {"Authorization": f"Bearer {self.api_key}", "OpenAI-Beta": "realtime=v1"}
+        try:
+            return await websockets.connect(self.url, additional_headers=headers, max_size=None)
+        except TypeError:
+            # websockets < 14 names the argument differently
+            return await websockets.connect(self.url, extra_headers=headers, max_size=None)
+
+    async def _pause(self, seconds: float):
+        """Sleep ``seconds`` unless stopped first."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _main(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                ws = await self._connect()
+            except Exception as e:
+                self.on_event("status", f"Streaming connect failed: {e}")
+                await self._pause(backoff)
+                backoff = min(backoff * 2, 10.0)
+                continue
+            self.on_event("status", "Streaming connected")
+            self._received = False
+            try:
+                await self._session(ws)
+            except Exception as e:
+                self.on_event("status", f"Streaming error: {e}")
+            finally:
+                try:
+                    await ws.close()
+                except Exception:
+                    pass
+            if self._stop.is_set():
+                break
+            # A server that accepts and hangs up at once must not get a tight loop
+            if self._received:
+                backoff = 0.5
+            self.on_event("status", f"Streaming dropped; reconnecting in {backoff:g}s")
+            await self._pause(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    async def _session(self, ws):
+        await ws.send(json.dumps({
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": {"model": self.model},
+                "turn_detection": {"type": "server_vad", "silence_duration_ms": 500},
+            },
+        }))
+        tasks = [
+            asyncio.create_task(self._send_audio(ws)),
+            asyncio.create_task(self._receive(ws)),
+            asyncio.create_task(self._stop.wait()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in tasks:
+                t.cancel()
+        for t in done:
+            if not t.cancelled() and t.exception():
+                raise t.exception()
+
+    async def _send_audio(self, ws):
+        pos = self.source.position
+        while True:
+            await asyncio.sleep(self.chunk_ms / 1000)
+            end = self.source.position
+            if end < pos:
+                # Source restarted from zero
+                pos = 0
+            data = self.source.audio_range(max(pos, self.source.oldest_position), end)
+            pos = end
+            if data is None:
+                continue
+            pcm = resample(data, self.source.samplerate, self.RATE)
+            if pcm.ndim == 2:
+                pcm = pcm.mean(axis=1) if pcm.shape[1] > 1 else pcm[:, 0]
+            if pcm.dtype != np.int16:
+                pcm = (np.clip(pcm, -1.0, 1.0) * 32767).astype(np.int16)
+            await ws.send(json.dumps({
+                "type": "input_audio_buffer.append",
+                "audio": base64.b64encode(np.ascontiguousarray(pcm).tobytes()).decode("ascii"),
+            }))
+
+    async def _receive(self, ws):
+        async for raw in ws:
+            self._received = True
+            try:
+                event = json.loads(raw)
+            except Exception:
+                continue
+            kind = event.get("type", "")
+            item = event.get("item_id", "")
+            if kind == "conversation.item.input_audio_transcription.delta":
+                text = self._partials.get(item, "") + event.get("delta", "")
+                self._partials[item] = text
+                self.on_event("partial", text)
+            elif kind == "conversation.item.input_audio_transcription.completed":
+                self._partials.pop(item, None)
+                self.on_event("final", (event.get("transcript") or "").strip())
+            elif kind == "error":
+                err = event.get("error") or {}
+                self.on_event("status", f"Streaming error: {err.get('message', err)}")
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+from .policy import Rejected
+
+# Request priorities: user-triggered work always goes before background work
+MANUAL = "manual"
+ROLLING = "rolling"
+
+
+class RateLimited(Rejected):
+    """A background request gave up waiting for rate-limit budget."""
+
+
+class TokenBucket:
+    """Refills continuously at ``per_minute``; holds at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._stamp = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_for(self, amount: float, floor: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken while leaving ``floor`` behind."""
+        self._refill(now)
+        # Never demand more than the bucket can hold, or a big request would wait forever
+        need = min(amount + floor, self.capacity) - self.level
+        return max(0.0, need / self.rate) if self.rate > 0 else 0.0
+
+    def take(self, amount: float):
+        self.level -= amount
+
+
+def parse_rate_limits(spec: str) -> dict[str, tuple[float, float]]:
+    """Parse ``model=rpm/tpm,...`` (0 or empty means unlimited) into ``{model: (rpm, tpm)}``."""
+    limits: dict[str, tuple[float, float]] = {}
+    for item in spec.split(","):
+        model, _, values = item.strip().partition("=")
+        if not model or not values:
+            continue
+        rpm, _, tpm = values.partition("/")
+        limits[model.strip()] = (float(rpm or 0), float(tpm or 0))
+    return limits
+
+
+class RequestScheduler:
+    """Shared request budget for every API caller, with manual traffic first.
+
+    Each model gets token buckets for requests and tokens per minute.
+    Manual requests (button, hotkeys, push-to-talk) may drain a bucket
+    completely and, while one is waiting, no rolling request is admitted.
+    Rolling requests must leave ``reserve`` of each bucket for manual use
+    and give up with :class:`RateLimited` after ``rolling_max_wait``
+    seconds, so stale background work is dropped instead of queueing.
+    Models without configured limits are never delayed.
+    """
+
+    def __init__(self, limits: dict[str, tuple[float, float]], reserve: float = 0.25, rolling_max_wait: float = 2.0):
+        self.reserve = reserve
+        self.rolling_max_wait = rolling_max_wait
+        self._buckets: dict[str, tuple[TokenBucket | None, TokenBucket | None]] = {
+            model: (TokenBucket(rpm) if rpm > 0 else None, TokenBucket(tpm) if tpm > 0 else None)
+            for model, (rpm, tpm) in limits.items()
+        }
+        self._manual_waiting = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _try(self, model: str, tokens: int, priority: str) -> float:
+        """Take budget and return 0, or return how long to wait before trying again."""
+        buckets = self._buckets.get(model)
+        if not buckets:
+            return 0.0
+        with self._lock:
+            if priority != MANUAL and self._manual_waiting:
+                return 0.05
+            now = time.monotonic()
+            waits = []
+            for bucket, amount in zip(buckets, (1, tokens)):
+                if bucket and amount:
+                    floor = 0.0 if priority == MANUAL else self.reserve * bucket.capacity
+                    waits.append(bucket.wait_for(amount, floor, now))
+            wait = max(waits, default=0.0)
+            if wait <= 0:
+                for bucket, amount in zip(buckets, (1, tokens)):
+                    if bucket and amount:
+                        bucket.take(amount)
+            return wait
+
+    def _enter(self, priority: str):
+        if priority == MANUAL:
+            with self._lock:
+                self._manual_waiting += 1
+
+    def _leave(self, priority: str):
+        if priority == MANUAL:
+            with self._lock:
+                self._manual_waiting -= 1
+
+    def _give_up(self, priority: str, waited: float, wait: float) -> bool:
+        if priority != MANUAL and waited + wait > self.rolling_max_wait:
+            self.dropped += 1
+            return True
+        return False
+
+    def acquire(self, model: str, tokens: int = 0, priority: str = MANUAL):
+        """Block until the request may be sent; raises RateLimited for stale rolling work."""
+        self._enter(priority)
+        try:
+            waited = 0.0
+            while True:
+                wait = self._try(model, tokens, priority)
+                if wait <= 0:
+                    return
+                if self._give_up(priority, waited, wait):
+                    raise RateLimited(f"{model} is at its rate limit; skipped a background request")
+                step = min(wait, 0.25)
+                time.sleep(step)
+                waited += step
+        finally:
+            self._leave(priority)
+
+    async def aacquire(self, model: str, tokens: int = 0, priority: str = MANUAL):
+        """Async :meth:`acquire`."""
+        self._enter(priority)
+        try:
+            waited = 0.0
+            while True:
+                wait = self._try(model, tokens, priority)
+                if wait <= 0:
+                    return
+                if self._give_up(priority, waited, wait):
+                    raise RateLimited(f"{model} is at its rate limit; skipped a background request")
+                step = min(wait, 0.25)
+                await asyncio.sleep(step)
+                waited += step
+        finally:
+            self._leave(priority)
@@ -0,0 +1,524 @@
+import queue
+import threading
+import time
+from typing import Callable
+
+from .archive import SessionArchive
+from .asr import LocalWhisperBackend, TranscriptionBackend, make_backend
+from .audio import CaptureEngine, audio_fingerprint
+from .cache import LRUCache
+from .jobs import JobExecutor, JobTicket
+from .openai_client import ConnectionWarmer, chat_complete, make_async_client, warm_connection
+from .pipeline import SuggestionPipeline
+from .policy import policy_from_config
+from .realtime import RealtimeTranscriber
+from .scheduler import MANUAL, ROLLING, RequestScheduler, parse_rate_limits
+from .suggester import (
+    SUMMARY_SYSTEM_PROMPT,
+    ConversationMemory,
+    build_summary_prompt,
+    build_system_prompt,
+    build_user_prompt,
+    load_resume,
+    looks_like_question,
+)
+from .tokens import count_tokens
+from .transcript import TranscriptStitcher, Word
+from .vad import Endpointer, VoiceActivityDetector
+
+
+class CopilotSession:
+    """Capture, transcription, suggestions and rolling mode, without a window.
+
+    Everything for the UI is posted to ``events`` as ``(kind, payload)``
+    pairs (``status``, ``transcript``, ``suggestions``, ...); the app drains
+    it on the Tk thread and ``bench_latency`` times it. ``style`` and
+    ``question_only`` mirror the toolbar, and ``device`` returns the
+    selected microphone index each time the capture stream is checked.
+    ``cfg`` may be None when no API key is configured; then only the empty
+    state exists.
+    """
+
+    def __init__(self, cfg, client, device: Callable[[], int | None] | None = None):
+        self.cfg = cfg
+        self.client = client
+        self.device = device or (lambda: self.cfg.input_device_index)
+        self.style = "Concise"
+        self.question_only = getattr(cfg, "rolling_question_only", True)
+        self.events: queue.Queue = queue.Queue()
+        self.asr: TranscriptionBackend | None = None
+        # Manual jobs (capture, push-to-talk, re-run); newer ones supersede older
+        self.jobs = JobExecutor(max_workers=2, on_superseded=lambda _t: self.events.put(("superseded", None)))
+        self.capture: CaptureEngine | None = None
+        # Optional second source: system/loopback audio carrying the interviewer
+        self.loopback: CaptureEngine | None = None
+        self.archive: SessionArchive | None = None
+        self._capture_lock = threading.Lock()
+        self.rolling_mic: CaptureEngine | None = None
+        self.pipeline: SuggestionPipeline | None = None
+        # One rate budget shared by every trigger; manual requests go first
+        self._scheduler: RequestScheduler | None = None
+        if cfg:
+            self._scheduler = RequestScheduler(
+                parse_rate_limits(cfg.rate_limits),
+                reserve=cfg.rate_reserve,
+                rolling_max_wait=cfg.rolling_max_wait_seconds,
+            )
+        # Part of the cached prompt prefix; read once per run
+        self._resume = load_resume(cfg.resume_file) if cfg else ""
+        # Earlier questions for follow-ups, bounded by CONTEXT_MAX_TOKENS
+        self.memory: ConversationMemory | None = None
+        if cfg and cfg.context_turns > 0:
+            self.memory = ConversationMemory(
+                self.summarize_turns,
+                keep_turns=cfg.context_turns,
+                max_tokens=cfg.context_max_tokens,
+            )
+        self._warmer: ConnectionWarmer | None = None
+        self._rolling_min_gap = 0.0
+        self._vad: VoiceActivityDetector | None = None
+        self._realtime: RealtimeTranscriber | None = None
+        self.transcript_cache = LRUCache(cfg.transcript_cache_size if cfg else 128)
+        self._last_suggest_ts = 0.0
+        self._last_transcript_snippet = ""
+
+    def status(self, text: str):
+        self.events.put(("status", text))
+
+    def start(self):
+        """Open the always-on streams and start transcription, suggestions and the warmer."""
+        if self.cfg.capture_always_on:
+            try:
+                self.ensure_capture()
+                self.ensure_loopback()
+            except Exception as e:
+                self.status(f"Microphone unavailable: {e}")
+        if self.cfg.archive_enabled:
+            self.start_archive()
+        self.start_asr()
+        self.start_pipeline()
+        self.start_warmer()
+
+    def close(self):
+        self.jobs.shutdown()
+        if self._warmer:
+            self._warmer.stop()
+        if self.pipeline:
+            self.pipeline.stop()
+        if self._realtime:
+            self._realtime.stop()
+        if self.memory:
+            self.memory.close()
+        if self.archive:
+            self.archive.close()
+        if self.asr:
+            self.asr.close()
+        for engine in (self.capture, self.loopback):
+            if engine:
+                engine.stop()
+
+    # Capture sources
+    def _new_engine(self, device: int | None) -> CaptureEngine:
+        engine = CaptureEngine(
+            samplerate=self.cfg.sample_rate,
+            channels=1,
+            device=device,
+            buffer_seconds=max(self.cfg.capture_buffer_seconds, self.cfg.capture_seconds * 2, 30),
+        )
+        engine.start()
+        return engine
+
+    def ensure_capture(self) -> CaptureEngine:
+        """Return the shared capture engine, opening it or following a device change."""
+        with self._capture_lock:
+            device = self.device()
+            if self.capture is None:
+                self.capture = self._new_engine(device)
+            elif not self.capture.active or self.capture.device != device:
+                self.capture.switch_device(device)
+            return self.capture
+
+    def ensure_loopback(self) -> CaptureEngine | None:
+        """Return the loopback engine when LOOPBACK_DEVICE_INDEX is set, else None."""
+        with self._capture_lock:
+            device = self.cfg.loopback_device_index
+            if device is None:
+                if self.loopback:
+                    self.loopback.stop()
+                    self.loopback = None
+                return None
+            if self.loopback is None:
+                self.loopback = self._new_engine(device)
+            elif not self.loopback.active or self.loopback.device != device:
+                self.loopback.switch_device(device)
+            return self.loopback
+
+    def interviewer_engine(self) -> CaptureEngine:
+        """Source that feeds transcription: loopback if configured, else the mic."""
+        return self.ensure_loopback() or self.ensure_capture()
+
+    def apply_loopback(self):
+        """Follow a changed LOOPBACK_DEVICE_INDEX.
+
+        Setting or clearing it changes which engine carries the interviewer
+        (a cleared loopback is stopped), so rolling mode is restarted on the
+        new source and the archive continues in a new file from it.
+        """
+        try:
+            engine = self.interviewer_engine()
+        except Exception:
+            # Do not keep reading a loopback that was just stopped
+            if self.rolling_mic and self.rolling_mic is not self.loopback:
+                self.stop_rolling()
+            raise
+        if self.rolling_mic and self.rolling_mic is not engine:
+            self.stop_rolling()
+            self.start_rolling()
+        if self.archive and self.archive.source is not engine:
+            self.archive.close()
+            self.archive = None
+            self.start_archive()
+
+    def start_asr(self):
+        """Create the transcription backend; a local model starts loading right away."""
+        self.asr = make_backend(self.cfg, self.client, self._scheduler)
+        if isinstance(self.asr, LocalWhisperBackend):
+            self.status(f"Loading {self.asr.name}...")
+
+            def loaded(fut):
+                err = fut.exception()
+                self.status(f"Local model failed: {err}" if err else f"{self.asr.name} ready")
+            self.asr.ready.add_done_callback(loaded)
+
+    def start_archive(self):
+        try:
+            self.archive = SessionArchive(self.interviewer_engine(), self.cfg.archive_dir)
+            self.archive.start()
+        except Exception as e:
+            self.archive = None
+            self.status(f"Session archive unavailable: {e}")
+
+    def start_pipeline(self):
+        self.pipeline = SuggestionPipeline(
+            make_async_client(
+                self.cfg.openai_api_key,
+                connect_timeout=self.cfg.api_connect_timeout,
+                read_timeout=self.cfg.api_read_timeout,
+                base_url=self.cfg.openai_base_url,
+            ),
+            self.cfg.suggest_model,
+            emit=lambda kind, payload: self.events.put((kind, payload)),
+            classify=self.classify_transcript,
+            build_prompts=self.build_prompts,
+            policy=policy_from_config(self.cfg, self.cfg.suggest_deadline_seconds, self.cfg.suggest_fallback_model),
+            cache=LRUCache(self.cfg.suggest_cache_size, ttl=self.cfg.suggest_cache_ttl_seconds),
+            speculate_similarity=self.cfg.speculate_similarity,
+            scheduler=self._scheduler,
+        )
+        self.pipeline.start()
+
+    def start_warmer(self):
+        """Pay DNS/TLS setup now, not on the first question, and keep the pools open."""
+        targets = [self.pipeline.warm]
+        if self.cfg.transcribe_backend != "local":
+            targets.append(lambda: warm_connection(self.client, self.cfg.transcribe_model))
+        self._warmer = ConnectionWarmer(
+            targets,
+            interval=self.cfg.api_keepalive_seconds,
+            on_warm=lambda ms: self.status(f"API connections ready ({ms:.0f} ms)"),
+        )
+        self._warmer.start()
+
+    # Manual path
+    def run_audio_job(self, ticket: JobTicket, data):
+        try:
+            self.process_audio(data, ticket)
+        except Exception as e:
+            self.events.put(("failed", f"Failed: {e}"))
+
+    def capture_and_suggest(self, ticket: JobTicket, engine: CaptureEngine, start: int, seconds: int):
+        try:
+            end = engine.position + int(seconds * engine.samplerate)
+            while engine.position < end and engine.active and not ticket.superseded:
+                time.sleep(0.05)
+            if ticket.superseded:
+                return
+            data = engine.audio_range(start, min(end, engine.position))
+            if data is None:
+                raise RuntimeError("No audio captured")
+            self.process_audio(data, ticket)
+        except Exception as e:
+            self.events.put(("failed", f"Failed: {e}"))
+
+    def transcribe(self, data, priority: str = MANUAL) -> str:
+        """Transcribe PCM, answering repeats of the same audio from the cache."""
+        key = (audio_fingerprint(data, self.cfg.sample_rate), self.asr.name, "text")
+        text = self.transcript_cache.get(key)
+        if text is None:
+            text = self.asr.transcribe(data, self.cfg.sample_rate, priority)
+            self.transcript_cache.put(key, text)
+        else:
+            st = self.transcript_cache.stats
+            self.status(f"Transcript cache hit ({st.hits}/{st.hits + st.misses})")
+        return text
+
+    def transcribe_words(self, data, priority: str = MANUAL) -> tuple[str, list]:
+        key = (audio_fingerprint(data, self.cfg.sample_rate), self.asr.name, "words")
+        hit = self.transcript_cache.get(key)
+        if hit is None:
+            hit = self.asr.transcribe_words(data, self.cfg.sample_rate, priority)
+            self.transcript_cache.put(key, hit)
+        return hit
+
+    def process_audio(self, data, ticket: JobTicket):
+        self.status(f"Transcribing ({self.asr.name})...")
+        transcript = self.transcribe(data)
+        if ticket.superseded:
+            # A newer capture owns the UI now
+            return
+        self.events.put(("transcript", transcript))
+        if self.memory:
+            self.memory.add(transcript)
+
+        self.pipeline.submit(transcript, job_id=ticket.id)
+
+    def build_prompts(self, transcript: str) -> tuple[str, str]:
+        context = self.memory.context(transcript) if self.memory else ""
+        return build_system_prompt(self._resume), build_user_prompt(transcript, context, self.style)
+
+    def summarize_turns(self, summary: str, turns: list[str]) -> str:
+        """Fold older questions into the memory summary; runs on the memory thread."""
+        user = build_summary_prompt(summary, turns)
+        if self._scheduler:
+            # Background work: gives way to captures and may be skipped
+            tokens = count_tokens(SUMMARY_SYSTEM_PROMPT + user, self.cfg.suggest_model) + 200
+            self._scheduler.acquire(self.cfg.suggest_model, tokens, ROLLING)
+        return chat_complete(self.client, self.cfg.suggest_model, SUMMARY_SYSTEM_PROMPT, user)
+
+    # Rolling mode
+    def start_rolling(self) -> bool:
+        """Attach the configured rolling source to the interviewer stream.
+
+        Returns False (after posting why) when it could not start.
+        """
+        if self.rolling_mic:
+            return True
+        try:
+            self.rolling_mic = self.interviewer_engine()
+        except Exception as e:
+            self.status(f"Rolling start failed: {e}")
+            self.rolling_mic = None
+            return False
+        self._last_suggest_ts = 0.0
+        self._last_transcript_snippet = ""
+        self._vad = self._make_vad() if self.cfg.vad_enabled else None
+        if self.cfg.rolling_mode == "streaming" and not self._start_streaming():
+            self.rolling_mic = None
+            return False
+        produce, interval = self._make_rolling_source()
+        self.pipeline.set_source(produce, interval)
+        self.status("Rolling ON (system audio)" if self.rolling_mic is self.loopback else "Rolling ON")
+        return True
+
+    def stop_rolling(self):
+        # The capture engine is shared, so only detach from it
+        if self.pipeline:
+            self.pipeline.set_source(None)
+        if self._realtime:
+            self._realtime.stop()
+            self._realtime = None
+        self.rolling_mic = None
+        self.status("Rolling OFF")
+
+    def _start_streaming(self) -> bool:
+        try:
+            import websockets  # noqa: F401
+        except Exception:
+            self.status("Streaming mode needs websockets: pip install websockets")
+            return False
+        self._realtime = RealtimeTranscriber(
+            self.rolling_mic,
+            self.cfg.openai_api_key,
+            self._on_stream_event,
+            url=self.cfg.realtime_url,
+            model=self.cfg.realtime_model,
+        )
+        self._realtime.start()
+        return True
+
+    def _on_stream_event(self, kind: str, text: str):
+        """Called on the realtime thread; hand everything to the event queue or the rolling loop."""
+        if kind == "partial":
+            self.events.put(("partial", text))
+            # Flag the question while the interviewer is still finishing it
+            is_question = looks_like_question(text)
+            self.events.put(("question", is_question))
+            if is_question and self.cfg.speculative_suggestions and len(text.split()) >= 4:
+                self.pipeline.speculate(text)
+        elif kind == "final":
+            if text:
+                self.events.put(("transcript", text))
+                self.pipeline.submit(text, source=ROLLING)
+        else:
+            self.events.put((kind, text))
+
+    def _make_vad(self) -> VoiceActivityDetector:
+        return VoiceActivityDetector(
+            samplerate=self.cfg.sample_rate,
+            energy_db=self.cfg.vad_energy_db,
+            snr_db=self.cfg.vad_snr_db,
+            min_speech_ratio=self.cfg.vad_min_speech_ratio,
+        )
+
+    def _vad_allows(self, data) -> bool:
+        """Return False (and report it) when the VAD says ``data`` is not speech."""
+        if not self._vad or self._vad.is_speech(data):
+            return True
+        stats = self._vad.stats
+        self.status(f"Rolling: silence (skipped {stats.skipped}/{stats.windows})")
+        return False
+
+    def _rolling_window_text(self, window: int) -> str | None:
+        data = self.rolling_mic.last_audio(window) if self.rolling_mic else None
+        if data is None or len(data) < int(0.2 * self.cfg.sample_rate):
+            return None
+        # Skip the API call entirely when the window holds no speech
+        if not self._vad_allows(data):
+            return None
+        return self.transcribe(data, ROLLING)
+
+    def _rolling_incremental_text(self, stitcher: TranscriptStitcher, window: int) -> str | None:
+        """Transcribe only audio past the commit point (plus overlap) and stitch it in.
+
+        Posts the running transcript and returns its last ``window`` seconds
+        for question detection, or None when there was nothing to send.
+        """
+        mic = self.rolling_mic
+        if not mic:
+            return None
+        sr = self.cfg.sample_rate
+        end = mic.position
+        cursor = int(stitcher.committed_until * sr)
+        if end - cursor < int(0.2 * sr):
+            return None
+        overlap = int(self.cfg.rolling_overlap_seconds * sr)
+        start = max(cursor - overlap, end - window * sr, 0)
+        if start > cursor:
+            # Commits stalled for a whole window; give up on the gap
+            stitcher.advance(start / sr)
+        data = mic.audio_range(start, end)
+        if data is None:
+            return None
+        if not self._vad_allows(data):
+            # Keep the overlap so speech starting at the edge is not lost
+            stitcher.advance(max(0, end - overlap) / sr)
+            return None
+        text, raw_words = self.transcribe_words(data, ROLLING)
+        t0, t1 = start / sr, end / sr
+        if not raw_words and text:
+            # No timestamps from this model: spread words evenly over the chunk
+            tokens = text.split()
+            span = (t1 - t0) / len(tokens)
+            raw_words = [(tok, i * span, (i + 1) * span) for i, tok in enumerate(tokens)]
+        stitcher.add_chunk([Word(w, t0 + a, t0 + b) for w, a, b in raw_words], t1)
+        self.events.put(("transcript", stitcher.text()))
+        return stitcher.text_since(t1 - window)
+
+    def _rolling_endpoint_text(self, endpointer: Endpointer) -> str | None:
+        """Advance the endpointer over new audio; transcribe once an utterance ends."""
+        mic = self.rolling_mic
+        if not mic:
+            return None
+        end = mic.position
+        # If a slow request kept us away longer than the buffer, skip ahead
+        start = max(endpointer.position, mic.oldest_position)
+        data = mic.audio_range(start, end)
+        if data is None:
+            return None
+        was_speech = endpointer.in_speech
+        utterances = endpointer.process(data, start)
+        if endpointer.in_speech and not was_speech:
+            self.status("Rolling: listening…")
+        if not utterances:
+            return None
+        # Normally one; after a stall send everything that finished as one request
+        audio = mic.audio_range(utterances[0].start, utterances[-1].end)
+        if audio is None or len(audio) < int(0.3 * self.cfg.sample_rate):
+            return None
+        self.status("Rolling: transcribing utterance…")
+        return self.transcribe(audio, ROLLING)
+
+    def _make_rolling_source(self):
+        """Return ``(produce, interval)`` feeding the pipeline for the configured mode.
+
+        ``produce`` runs on the pipeline's transcription worker and returns
+        the text to classify, or None. Streaming mode is fed by the realtime
+        socket instead and returns no source.
+        """
+        mode = self.cfg.rolling_mode
+        step = max(1, self.cfg.rolling_step_seconds)
+        window = max(2, self.cfg.rolling_window_seconds)
+        self._rolling_min_gap = max(3, self.cfg.rolling_min_suggest_gap)
+        if mode in ("endpoint", "streaming"):
+            # Every utterance is new speech, so no cooldown between them
+            self._rolling_min_gap = 0
+        if mode == "streaming":
+            return None, step
+        if mode == "incremental":
+            stitcher = TranscriptStitcher()
+
+            def produce():
+                text = self._rolling_incremental_text(stitcher, window)
+                if text is None:
+                    self.events.put(("question", False))
+                return text
+
+            return produce, step
+        if mode == "endpoint":
+            endpointer = Endpointer(
+                self._vad or self._make_vad(),
+                hangover_ms=self.cfg.endpoint_hangover_ms,
+                max_utterance_seconds=self.cfg.endpoint_max_utterance_seconds,
+            )
+            endpointer.reset(self.rolling_mic.position)
+
+            def produce():
+                # Polls often; leave the badge alone until the next utterance
+                text = self._rolling_endpoint_text(endpointer)
+                if text:
+                    self.events.put(("transcript", text.strip()))
+                return text
+
+            return produce, 0.1
+
+        def produce():
+            text = self._rolling_window_text(window)
+            if text is None:
+                self.events.put(("question", False))
+            elif text.strip():
+                self.events.put(("transcript", text.strip()))
+            return text
+
+        return produce, step
+
+    def classify_transcript(self, transcript: str) -> bool:
+        """Decide on the pipeline thread whether a rolling transcript gets suggestions."""
+        text = transcript.strip()
+        # Skip tiny chunks
+        if len(text.split()) < 4:
+            self.events.put(("question", False))
+            return False
+        # Heuristic: only trigger on questions if enabled
+        if self.question_only and not looks_like_question(text):
+            self.events.put(("question", False))
+            return False
+        # Still indicate question state when suppressed by cooldown
+        self.events.put(("question", True))
+        now = time.time()
+        if now - self._last_suggest_ts < self._rolling_min_gap or text == self._last_transcript_snippet:
+            return False
+        self._last_transcript_snippet = text
+        self._last_suggest_ts = now
+        if self.memory:
+            self.memory.add(text)
+        return True
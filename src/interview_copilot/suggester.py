@@ -1,29 +1,257 @@
-from textwrap import dedent
-
-
-def build_system_prompt(style: str = "Concise") -> str:
-    base = dedent(
-        """
-        You are an interview assistant that drafts succinct, high-quality answers.
-        Output 3 numbered suggestions. Keep each under 2 sentences unless depth is essential.
-        Be direct, professional, and specific. Avoid fluff.
-        """
-    ).strip()
-    if style.lower() == "star":
-        base += "\nUse STAR framing where helpful (Situation, Task, Action, Result)."
-    elif style.lower() == "technical":
-        base += "\nBias towards technical depth, tradeoffs, and concrete examples."
-    return base
-
-
-def build_user_prompt(transcript: str) -> str:
-    return dedent(f"""
-        Interviewer said (transcribed):
-        {transcript}
-
-        Draft 3 candidate replies for me to say next.
-        Format:
-        1) ...
-        2) ...
-        3) ...
-    """).strip()
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable
+
+from .tokens import count_tokens
+from .transcript import normalize_text
+
+
+# Stable across a session: persona and output rules lead every request so
+# the provider can serve them from its prompt-prefix cache
+_PERSONA = "You are an interview assistant that drafts succinct, high-quality answers."
+_RULES = (
+    "Output 3 numbered suggestions. Keep each under 2 sentences unless depth is essential.\n"
+    "Be direct, professional, and specific. Avoid fluff.\n"
+    "Format:\n1) ...\n2) ...\n3) ..."
+)
+
+STYLE_HINTS = {
+    "star": "Use STAR framing where helpful (Situation, Task, Action, Result).",
+    "technical": "Bias towards technical depth, tradeoffs, and concrete examples.",
+}
+
+
+@lru_cache(maxsize=8)
+def build_system_prompt(resume: str = "") -> str:
+    """The shared prompt prefix: persona, formatting rules and the candidate's resume.
+
+    Nothing per-request belongs here; style, context and the transcript go
+    in the user prompt so the prefix stays byte-identical between calls.
+    """
+    parts = [_PERSONA, _RULES]
+    if resume.strip():
+        parts.append(f"Candidate background (resume):\n{resume.strip()}")
+    return "\n\n".join(parts)
+
+
+def build_user_prompt(transcript: str, context: str = "", style: str = "Concise") -> str:
+    """Variable part of a request, ordered from least to most likely to change."""
+    parts = []
+    hint = STYLE_HINTS.get(style.lower())
+    if hint:
+        parts.append(hint)
+    if context:
+        parts.append(f"Earlier in this interview:\n{context}")
+    parts.append(f"Interviewer said (transcribed):\n{transcript}")
+    parts.append("Draft 3 candidate replies for me to say next.")
+    return "\n\n".join(parts)
+
+
+def load_resume(path: str) -> str:
+    """Text of the resume file at ``path``; empty when unset or unreadable."""
+    if not path:
+        return ""
+    try:
+        with open(os.path.expanduser(path), encoding="utf-8") as f:
+            return f.read().strip()
+    except Exception:
+        return ""
+
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You keep short running notes on a job interview for the candidate. "
+    "Record topics covered, facts the candidate should stay consistent with, "
+    "and anything the interviewer asked to come back to. Plain sentences, no preamble."
+)
+
+
+def build_summary_prompt(summary: str, turns: list[str], max_words: int = 150) -> str:
+    earlier = summary or "(none yet)"
+    new = "\n".join(f"- {t}" for t in turns)
+    return (
+        f"Notes so far:\n{earlier}\n\n"
+        f"Interviewer said since then:\n{new}\n\n"
+        f"Rewrite the notes to include the new turns, in at most {max_words} words."
+    )
+
+
+def _fit(text: str, tokens: int) -> str:
+    """Trim ``text`` to at most ``tokens`` (as counted by the tokenizer), cutting at a word boundary."""
+    if count_tokens(text) <= tokens:
+        return text
+    words = text.split(" ")
+    lo, hi = 0, len(words) - 1
+    # Longest word prefix that still fits once marked as cut
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(" ".join(words[:mid]) + " ...") <= tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) + " ..." if lo else ""
+
+
+class ConversationMemory:
+    """What the interviewer said so far, in a bounded amount of prompt.
+
+    The newest ``keep_turns`` turns are kept verbatim. Older turns are
+    folded into a running summary by ``summarize(summary, turns)`` on a
+    background thread, so adding a turn never waits on the API. Until a
+    fold lands, the unsummarized turns are still offered to the prompt.
+    :meth:`context` never exceeds ``max_tokens``: newest turns come first,
+    then the summary, then the turns waiting to be summarized.
+    """
+
+    # Unsummarized turns kept while summaries keep failing
+    MAX_PENDING = 20
+
+    def __init__(
+        self,
+        summarize: Callable[[str, list[str]], str] | None = None,
+        keep_turns: int = 4,
+        max_tokens: int = 600,
+    ):
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.max_tokens = max_tokens
+        self.summary = ""
+        self._recent: list[str] = []
+        self._pending: list[str] = []
+        self._folding = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+
+    def add(self, text: str):
+        text = " ".join(text.split())
+        if not text:
+            return
+        with self._lock:
+            if self._recent and self._recent[-1] == text:
+                return
+            self._recent.append(text)
+            while len(self._recent) > self.keep_turns:
+                self._pending.append(self._recent.pop(0))
+            if not self.summarize:
+                self._pending.clear()
+            elif not self._folding:
+                del self._pending[: -self.MAX_PENDING]
+        self._fold_later()
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._pending.clear()
+            self.summary = ""
+            # Folds still running belong to the old conversation
+            self._generation += 1
+
+    def _fold_later(self):
+        with self._lock:
+            if self._folding or not self._pending or not self.summarize:
+                return
+            self._folding = True
+            job = (self.summary, list(self._pending), self._generation)
+        self._executor.submit(self._fold, *job)
+
+    def _fold(self, summary: str, turns: list[str], generation: int):
+        try:
+            new = self.summarize(summary, turns).strip()
+        except Exception:
+            # Keep the turns; the next add() tries again
+            new = None
+        with self._lock:
+            self._folding = False
+            if new is None or generation != self._generation:
+                return
+            self.summary = new
+            del self._pending[: len(turns)]
+        # More turns may have been pushed out meanwhile
+        self._fold_later()
+
+    def context(self, current: str = "") -> str:
+        """Earlier conversation for a prompt answering ``current``, within ``max_tokens``."""
+        with self._lock:
+            recent, pending, full_summary = list(self._recent), list(self._pending), self.summary
+        # The turn being answered is already in the prompt
+        if recent and normalize_text(recent[-1]) == normalize_text(current):
+            recent.pop()
+        summary = ""
+        newer: list[str] = []
+        older: list[str] = []
+
+        def render() -> str:
+            lines = [f"Summary: {summary}"] if summary else []
+            return "\n".join(lines + [f"- {t}" for t in older + newer])
+
+        # Every step is checked against the tokenizer on the joined text,
+        # so the result fits even where per-piece counts would not add up
+        def fits() -> bool:
+            return count_tokens(render()) <= self.max_tokens
+
+        for turn in reversed(recent):
+            newer.insert(0, turn)
+            if not fits():
+                newer.pop(0)
+                break
+        if full_summary:
+            room = self.max_tokens - count_tokens(render()) - 4
+            summary = _fit(full_summary, room) if room > 8 else ""
+            while summary and not fits():
+                summary = _fit(summary, count_tokens(summary) - 1)
+        for turn in reversed(pending):
+            older.insert(0, turn)
+            if not fits():
+                older.pop(0)
+                break
+        return render()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def looks_like_question(text: str) -> bool:
+    """Heuristic: does the end of ``text`` read like a question to answer?"""
+    try:
+        t = text.strip()
+        if not t:
+            return False
+        # Direct question mark near end
+        if '?' in t[-200:]:
+            return True
+        # Take last sentence-ish
+        parts = re.split(r'[.!?]\s+', t)
+        last = parts[-1].strip().lower()
+        if not last:
+            return False
+        # Keywords and auxiliaries
+        wh = (
+            'what', 'why', 'how', 'when', 'where', 'who', 'whom', 'whose', 'which'
+        )
+        aux = (
+            'can', 'could', 'would', 'will', 'do', 'does', 'did', 'is', 'are', 'am',
+            'was', 'were', 'have', 'has', 'should', 'may', 'might'
+        )
+        phrases = (
+            'tell me about', 'walk me through', 'could you explain', 'please explain',
+            'what about', 'what is your', 'how would you', 'how do you', 'why did you'
+        )
+        words = last.split()
+        if not words:
+            return False
+        # Starts with WH or auxiliary → likely a question
+        if words[0] in wh or words[0] in aux:
+            return True
+        # Contains indicative phrases
+        for p in phrases:
+            if p in last:
+                return True
+        # Ends with up‑speak keywords
+        if last.endswith((' right', ' correct', ' okay', ' ok')):
+            return True
+        return False
+    except Exception:
+        return False
@@ -0,0 +1,73 @@
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except Exception:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Tokens in ``text`` for ``model``: exact with tiktoken, else about 4 characters each."""
+    enc = _encoding(model)
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+@dataclass
+class TokenUsage:
+    requests: int = 0
+    prompt: int = 0
+    # Prompt tokens the provider served from its prefix cache
+    cached: int = 0
+    completion: int = 0
+    # Local count of the prompt, to check the estimate against the API
+    estimated: int = 0
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached / self.prompt if self.prompt else 0.0
+
+
+class TokenMeter:
+    """Totals of the ``usage`` reported with each completion; thread-safe."""
+
+    def __init__(self):
+        self.total = TokenUsage()
+        self._lock = threading.Lock()
+
+    def record(self, usage, estimated: int = 0) -> TokenUsage:
+        """Add one response's usage object (may be None); return its counts."""
+        one = TokenUsage(requests=1, estimated=estimated)
+        if usage is not None:
+            one.prompt = getattr(usage, "prompt_tokens", 0) or 0
+            one.completion = getattr(usage, "completion_tokens", 0) or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            one.cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        with self._lock:
+            t = self.total
+            t.requests += 1
+            t.prompt += one.prompt
+            t.cached += one.cached
+            t.completion += one.completion
+            t.estimated += one.estimated
+        return one
+
+    def summary(self) -> str:
+        t = self.total
+        return (
+            f"{t.requests} requests, {t.prompt} prompt tokens ({t.cached_ratio:.0%} cached), "
+            f"{t.completion} completion tokens"
+        )
@@ -0,0 +1,78 @@
+import re
+from dataclasses import dataclass
+
+
+@dataclass
+class Word:
+    text: str
+    # Seconds on the capture stream's clock (not relative to a chunk)
+    start: float
+    end: float
+
+
+def normalize_text(text: str) -> str:
+    """Case, spacing and punctuation-insensitive form of a transcript.
+
+    Shared by word alignment, suggestion cache keys and memory de-duplication.
+    """
+    return " ".join(re.sub(r"[^\w']+", " ", text.lower()).split())
+
+
+class TranscriptStitcher:
+    """Merge overlapping chunk transcripts into one running transcript.
+
+    Each chunk is sent with a little audio that was already transcribed. The
+    stitcher drops words that fall before the commit point, aligns the head
+    of the chunk against the committed tail to remove words re-heard in the
+    overlap, and commits words once they end ``stable_margin`` seconds before
+    the chunk edge (words at the edge may be cut off and are re-transcribed
+    by the next chunk). Uncommitted words are kept as a tentative tail.
+    """
+
+    def __init__(self, stable_margin: float = 1.0, max_align: int = 8):
+        self.stable_margin = stable_margin
+        self.max_align = max_align
+        self.committed: list[Word] = []
+        self.tentative: list[Word] = []
+        self._cursor = 0.0
+
+    @property
+    def committed_until(self) -> float:
+        """Stream time up to which audio needs no further transcription."""
+        return self._cursor
+
+    def advance(self, t: float):
+        """Move the commit point forward without words (e.g. over silence)."""
+        if t > self._cursor:
+            self._cursor = t
+            self.tentative = [w for w in self.tentative if w.start >= t]
+
+    def _overlap_len(self, words: list[Word]) -> int:
+        tail = [normalize_text(w.text) for w in self.committed[-self.max_align:]]
+        head = [normalize_text(w.text) for w in words[: self.max_align]]
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k]:
+                return k
+        return 0
+
+    def add_chunk(self, words: list[Word], chunk_end: float) -> list[Word]:
+        """Stitch a chunk's words (absolute times) in; return newly committed words."""
+        # Words whose midpoint is already covered are duplicates of the overlap
+        fresh = [w for w in words if (w.start + w.end) / 2 >= self._cursor and normalize_text(w.text)]
+        # Timestamps jitter between requests; text alignment catches the rest
+        fresh = fresh[self._overlap_len(fresh):]
+
+        stable_until = chunk_end - self.stable_margin
+        new = [w for w in fresh if w.end <= stable_until]
+        self.tentative = fresh[len(new):]
+        self.committed.extend(new)
+        if new:
+            self._cursor = max(self._cursor, new[-1].end)
+        return new
+
+    def text(self) -> str:
+        return " ".join(w.text.strip() for w in self.committed + self.tentative).strip()
+
+    def text_since(self, t: float) -> str:
+        """Committed and tentative text for words ending after stream time ``t``."""
+        return " ".join(w.text.strip() for w in self.committed + self.tentative if w.end > t).strip()
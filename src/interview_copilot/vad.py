@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .audio import to_float32
+
+
+@dataclass
+class VadStats:
+    windows: int = 0
+    speech: int = 0
+    skipped: int = 0
+
+
+class VoiceActivityDetector:
+    """Frame-level speech detector, fully vectorized with NumPy.
+
+    A frame counts as speech when it is loud enough (absolute floor, and
+    ``snr_db`` above the tracked noise floor), not noise-like (zero-crossing
+    rate below ``zcr_max``) and not spectrally flat (``flatness_max``).
+    A window is speech when at least ``min_speech_ratio`` of its frames are.
+    """
+
+    def __init__(
+        self,
+        samplerate: int = 16000,
+        frame_ms: int = 30,
+        energy_db: float = -50.0,
+        snr_db: float = 10.0,
+        zcr_max: float = 0.35,
+        flatness_max: float = 0.45,
+        min_speech_ratio: float = 0.1,
+        noise_rise: float = 0.00025,
+    ):
+        self.samplerate = samplerate
+        self.frame_len = max(1, int(samplerate * frame_ms / 1000))
+        self.energy_db = energy_db
+        self.snr_db = snr_db
+        self.zcr_max = zcr_max
+        self.flatness_max = flatness_max
+        self.min_speech_ratio = min_speech_ratio
+        # Per-frame rate at which the noise floor may rise, so adaptation
+        # speed does not depend on how much audio each call looks at
+        self.noise_rise = noise_rise
+        self.stats = VadStats()
+        self._noise_db: float | None = None
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+
+    def _frames(self, data: np.ndarray) -> np.ndarray:
+        x = to_float32(data)
+        if x.ndim == 2:
+            x = x.mean(axis=1) if x.shape[1] > 1 else x[:, 0]
+        n = len(x) // self.frame_len
+        return x[: n * self.frame_len].reshape(n, self.frame_len)
+
+    def frame_decisions(self, data: np.ndarray) -> np.ndarray:
+        """Return one boolean per frame: True where the frame looks like speech."""
+        frames = self._frames(data)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+        energy = 10.0 * np.log10(np.mean(np.square(frames), axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        power = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1))) + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+        # Track the noise floor from the quietest frames so the threshold
+        # follows the room rather than a fixed level: drop to quieter floors
+        # immediately, rise only slowly so long speech does not mask itself
+        floor = float(np.percentile(energy, 10))
+        if self._noise_db is None or floor < self._noise_db:
+            self._noise_db = floor
+        else:
+            alpha = 1.0 - (1.0 - self.noise_rise) ** len(frames)
+            self._noise_db += alpha * (floor - self._noise_db)
+        threshold = max(self.energy_db, self._noise_db + self.snr_db)
+        return (energy > threshold) & (zcr < self.zcr_max) & (flatness < self.flatness_max)
+
+    def is_speech(self, data: np.ndarray) -> bool:
+        decisions = self.frame_decisions(data)
+        speech = bool(len(decisions)) and float(decisions.mean()) >= self.min_speech_ratio
+        self.stats.windows += 1
+        if speech:
+            self.stats.speech += 1
+        else:
+            self.stats.skipped += 1
+        return speech
+
+
+@dataclass
+class Utterance:
+    # Absolute frame positions on the capture stream, end exclusive
+    start: int
+    end: int
+
+
+class Endpointer:
+    """Detect utterance boundaries on a live stream using VAD frame decisions.
+
+    Speech onset needs ``onset_ms`` of consecutive speech frames; an utterance
+    ends after ``hangover_ms`` of trailing silence, or is cut at
+    ``max_utterance_seconds``. ``preroll_ms`` of audio before the onset is
+    included so soft first syllables are kept.
+    """
+
+    def __init__(
+        self,
+        vad: VoiceActivityDetector,
+        onset_ms: int = 150,
+        hangover_ms: int = 700,
+        max_utterance_seconds: float = 15.0,
+        preroll_ms: int = 200,
+    ):
+        self.vad = vad
+        fl = vad.frame_len
+        rate = vad.samplerate
+        self._onset = max(1, int(onset_ms * rate / 1000 / fl))
+        self._hangover = max(1, int(hangover_ms * rate / 1000 / fl))
+        self._max_frames = int(max_utterance_seconds * rate)
+        self._preroll = int(preroll_ms * rate / 1000)
+        self.position = 0
+        self.in_speech = False
+        self._run = 0
+        self._silence = 0
+        self._start = 0
+        self._last_speech_end = 0
+
+    def reset(self, position: int = 0):
+        self.position = position
+        self.in_speech = False
+        self._run = 0
+        self._silence = 0
+
+    def process(self, data, start: int) -> list[Utterance]:
+        """Feed audio beginning at absolute frame ``start``; return finished utterances.
+
+        Only whole VAD frames are consumed; ``position`` tells the caller
+        where the next call should start.
+        """
+        fl = self.vad.frame_len
+        decisions = self.vad.frame_decisions(data)
+        done: list[Utterance] = []
+        for i, speech in enumerate(decisions):
+            pos = start + i * fl
+            if not self.in_speech:
+                self._run = self._run + 1 if speech else 0
+                if self._run >= self._onset:
+                    self.in_speech = True
+                    self._silence = 0
+                    self._start = max(0, pos - (self._run - 1) * fl - self._preroll)
+                    self._last_speech_end = pos + fl
+                continue
+            if speech:
+                self._silence = 0
+                self._last_speech_end = pos + fl
+            else:
+                self._silence += 1
+            if self._silence >= self._hangover:
+                done.append(Utterance(self._start, self._last_speech_end))
+                self.in_speech = False
+                self._run = 0
+            elif pos + fl - self._start >= self._max_frames:
+                # Cut overly long speech and carry on with a new utterance
+                done.append(Utterance(self._start, pos + fl))
+                self._start = pos + fl
+        self.position = start + len(decisions) * fl
+        return done
+
+    def flush(self) -> Utterance | None:
+        """End of input: close the utterance still in progress, if any."""
+        if not self.in_speech:
+            return None
+        self.in_speech = False
+        self._run = 0
+        return Utterance(self._start, self._last_speech_end)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from interview_copilot.audio import audio_fingerprint
+
+
+def _tone(seconds=1.0, sr=16000, freq=220.0):
+    t = np.arange(int(seconds * sr)) / sr
+    return (0.3 * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def test_fingerprint_is_stable_across_dtype_and_layout():
+    clip = _tone()
+    key = audio_fingerprint(clip, 16000)
+    assert audio_fingerprint(clip.copy(), 16000) == key
+    assert audio_fingerprint(clip[:, 0], 16000) == key
+    assert audio_fingerprint(clip.astype(np.float32) / 32768, 16000) == key
+
+
+def test_fingerprint_separates_clips_with_the_same_envelope():
+    clip = _tone()
+    key = audio_fingerprint(clip, 16000)
+    # Same RMS envelope, different waveform
+    assert audio_fingerprint(-clip, 16000) != key
+    assert audio_fingerprint(_tone(freq=330.0), 16000) != key
+    assert audio_fingerprint(np.roll(clip, 40, axis=0), 16000) != key
+    # Same content, different length
+    assert audio_fingerprint(clip[:-1], 16000) != key
+    assert audio_fingerprint(clip, 8000) != key
+
+
+def test_ring_buffer_wraps_and_reads_absolute_ranges():
+    from interview_copilot.audio import RingBuffer
+
+    ring = RingBuffer(8, reserve_frames=2)
+    data = np.arange(1, 15, dtype=np.int16)
+    for block in np.array_split(data, 5):
+        ring.write(block)
+    assert ring.written == 14
+    assert ring.readable == 8
+    assert ring.oldest == 6
+    # Wraps around the end of storage: one copy, in stream order
+    assert ring.read_range(6, 14)[:, 0].tolist() == data[6:14].tolist()
+    assert ring.read_last(3)[:, 0].tolist() == [12, 13, 14]
+    # Older than the readable window is clipped; future positions are not invented
+    assert ring.read_range(0, 8)[:, 0].tolist() == [7, 8]
+    assert ring.read_range(14, 20) is None
+
+
+def test_ring_buffer_keeps_the_newest_of_an_oversized_block():
+    from interview_copilot.audio import RingBuffer
+
+    ring = RingBuffer(4)
+    ring.write(np.arange(10, dtype=np.int16))
+    assert ring.written == 10
+    assert ring.read_last(4)[:, 0].tolist() == [6, 7, 8, 9]
+    ring.reset()
+    assert ring.written == 0 and ring.read_last(4) is None
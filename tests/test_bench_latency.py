@@ -0,0 +1,11 @@
+from interview_copilot.bench_latency import check_budgets
+
+
+def test_budgets_fail_on_slow_missing_stages_and_failures():
+    results = {"capture.suggest": {"p95": 900.0}}
+    assert check_budgets(results, {}, "capture.suggest=1000") == []
+    assert check_budgets(results, {}, "capture.suggest=800")
+    # A budgeted stage that never ran is a failure, not a pass
+    assert check_budgets(results, {}, "rolling.suggest=1000")
+    assert check_budgets(results, {"capture": 1}, "")
+    assert check_budgets(results, {"capture": 1}, "", allow_failures=True) == []
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from interview_copilot.cache import LRUCache, SingleFlight
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_single_flight_shares_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(3)))
+        assert "k" not in flight
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert results == ["result"] * 3
+    assert len(calls) == 1
+    assert flight.coalesced == 2
+
+
+def test_single_flight_shares_errors_and_survives_a_cancelled_follower():
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        flight = SingleFlight()
+        a = asyncio.ensure_future(flight.do("e", fail))
+        b = asyncio.ensure_future(flight.do("e", fail))
+        for task in (a, b):
+            with pytest.raises(ValueError):
+                await task
+        leader = asyncio.ensure_future(flight.do("s", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("s", slow))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        assert await leader == "done"
+
+    asyncio.run(main())
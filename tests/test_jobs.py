@@ -0,0 +1,31 @@
+import threading
+
+from interview_copilot.jobs import JobExecutor
+
+
+def test_newer_jobs_supersede_queued_and_running_ones():
+    superseded = []
+    executor = JobExecutor(max_workers=1, on_superseded=lambda t: superseded.append(t.label))
+    started, release, finished = threading.Event(), threading.Event(), threading.Event()
+    seen = {}
+
+    def running(ticket):
+        started.set()
+        release.wait(5)
+        seen["running"] = ticket.superseded
+
+    def ran(ticket):
+        seen[ticket.label] = ticket.superseded
+        finished.set()
+
+    first = executor.submit(running, "first")
+    started.wait(5)
+    executor.submit(ran, "queued")
+    last = executor.submit(ran, "last")
+    release.set()
+    assert finished.wait(5)
+    executor.shutdown()
+    # The queued job never ran; the running one was told to stop
+    assert superseded == ["queued"]
+    assert seen == {"running": True, "last": False}
+    assert first.id < last.id and not last.superseded
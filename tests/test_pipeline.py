@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+from interview_copilot.pipeline import SuggestionPipeline
+from interview_copilot.scheduler import ROLLING
+
+
+class _Events:
+    def __init__(self):
+        self.items: list[tuple[str, object]] = []
+        self.cond = threading.Condition()
+
+    def __call__(self, kind, payload):
+        with self.cond:
+            self.items.append((kind, payload))
+            self.cond.notify_all()
+
+    def wait_for(self, kind: str, count: int, timeout: float = 5.0) -> bool:
+        with self.cond:
+            return self.cond.wait_for(lambda: self.kinds().count(kind) >= count, timeout)
+
+    def kinds(self) -> list[str]:
+        return [k for k, _ in self.items]
+
+
+def _pipeline(events):
+    return SuggestionPipeline(
+        None, "m", emit=events, classify=lambda text: True, build_prompts=lambda text: ("system", text)
+    )
+
+
+def test_identical_requests_share_one_call():
+    events = _Events()
+    pipeline = _pipeline(events)
+    calls = []
+
+    async def generate(system, user, priority):
+        calls.append(user)
+        await asyncio.sleep(0.2)
+        events("suggestions", "answer")
+        return "answer"
+
+    pipeline._generate = generate
+    pipeline.start()
+    try:
+        pipeline.submit("Why this role?")
+        # Arrives while the first is streaming, not while it is still queued
+        time.sleep(0.05)
+        pipeline.submit("why this role")
+        # The leader renders, the attached job repeats the shared answer
+        assert events.wait_for("suggestions", 2)
+    finally:
+        pipeline.stop()
+    assert calls == ["Why this role?"]
+    assert pipeline.flight.coalesced == 1
+    assert "superseded" not in events.kinds()
+    assert ("suggestions", "answer") in events.items
+
+
+def test_different_request_replaces_the_running_one():
+    events = _Events()
+    pipeline = _pipeline(events)
+    calls = []
+
+    async def generate(system, user, priority):
+        calls.append(user)
+        await asyncio.sleep(0.2)
+        events("suggestions", user)
+        return user
+
+    pipeline._generate = generate
+    pipeline.start()
+    try:
+        pipeline.submit("first question")
+        time.sleep(0.05)
+        pipeline.submit("second question")
+        assert events.wait_for("suggestions", 1)
+    finally:
+        pipeline.stop()
+    assert calls == ["first question", "second question"]
+    assert "superseded" in events.kinds()
+    assert events.items[-1] == ("suggestions", "second question")
+    assert pipeline.flight.coalesced == 0
+
+
+def test_cache_hit_drops_the_running_speculation():
+    events = _Events()
+    pipeline = _pipeline(events)
+
+    async def speculation(spec, system, user):
+        await asyncio.sleep(10)
+
+    pipeline._run_speculation = speculation
+    pipeline.cache.put(("why this role", "system", "m", pipeline.temperature), "cached answer")
+    pipeline.start()
+    try:
+        pipeline.speculate("Why this role")
+        pipeline.submit("Why this role?", source=ROLLING)
+        assert events.wait_for("suggestions", 1)
+    finally:
+        pipeline.stop()
+    assert pipeline._spec is None
+    assert pipeline.spec_stats.cancelled == 1
+    assert ("suggestions", "cached answer") in events.items
+
+
+def test_cancelled_job_stops_its_committed_speculation():
+    events = _Events()
+    pipeline = _pipeline(events)
+    started, cancelled = threading.Event(), threading.Event()
+
+    async def speculation(spec, system, user):
+        spec.deltas.put_nowait("1) partial ")
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    pipeline._run_speculation = speculation
+    pipeline.start()
+    try:
+        pipeline.speculate("Why this role")
+        assert started.wait(5)
+        pipeline.submit("Why this role?", source=ROLLING)
+        assert events.wait_for("suggest_delta", 1)
+        # A newer capture supersedes the job rendering the speculation
+        pipeline.submit("Tell me about a project you led")
+        assert cancelled.wait(5)
+    finally:
+        pipeline.stop()
+    assert pipeline.spec_stats.committed == 1
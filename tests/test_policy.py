@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from interview_copilot.policy import CircuitBreaker, DeadlineExceeded, RequestPolicy
+
+
+def test_abandoned_attempts_do_not_delay_later_calls():
+    policy = RequestPolicy(deadline=0.2, max_retries=0, hedge_percentile=0.0, breaker=CircuitBreaker(failures=100))
+    release = threading.Event()
+
+    def stuck(model):
+        release.wait(5)
+        return "late"
+
+    try:
+        # More timed-out calls than the old shared pool had workers
+        for _ in range(6):
+            with pytest.raises(DeadlineExceeded):
+                policy.call(stuck, "m")
+        t0 = time.monotonic()
+        assert policy.call(lambda model: "ok", "m") == "ok"
+        assert time.monotonic() - t0 < 0.1
+        assert policy.stats.abandoned == 6
+    finally:
+        release.set()
+
+
+def test_retries_share_one_deadline():
+    policy = RequestPolicy(deadline=0.3, max_retries=5, hedge_percentile=0.0, backoff_base=0.01)
+
+    def slow_failure(model):
+        time.sleep(0.12)
+        raise ConnectionError("reset")
+
+    t0 = time.monotonic()
+    with pytest.raises((ConnectionError, DeadlineExceeded)):
+        policy.call(slow_failure, "m")
+    assert time.monotonic() - t0 < 0.45
+
+
+def test_half_open_breaker_admits_a_single_trial():
+    breaker = CircuitBreaker(failures=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert [breaker.allow() for _ in range(3)] == [True, False, False]
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_only_transient_errors_are_retried():
+    policy = RequestPolicy(
+        deadline=1.0, max_retries=3, hedge_percentile=0.0, backoff_base=0.001, breaker=CircuitBreaker(failures=100)
+    )
+    calls = []
+
+    def bug(model):
+        calls.append(model)
+        raise KeyError("choices")
+
+    with pytest.raises(KeyError):
+        policy.call(bug, "m")
+    assert len(calls) == 1
+
+    calls.clear()
+
+    def flaky(model):
+        calls.append(model)
+        if len(calls) < 3:
+            raise TimeoutError("read timed out")
+        return "ok"
+
+    assert policy.call(flaky, "m") == "ok"
+    assert len(calls) == 3
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from interview_copilot.audio import RollingMic
+from interview_copilot.mock_server import QUESTIONS, MockOpenAIServer, MockSettings
+from interview_copilot.realtime import RealtimeTranscriber
+
+pytest.importorskip("websockets")
+
+
+def test_streams_audio_and_reports_transcripts():
+    server = MockOpenAIServer(MockSettings(transcribe_ms=20, token_ms=1, jitter=0), realtime_port=0).start()
+    sr = 16000
+    # Never opened: the test writes the captured audio itself
+    mic = RollingMic(samplerate=sr, buffer_seconds=5)
+    events = []
+    finals = threading.Event()
+
+    def on_event(kind, text):
+        events.append((kind, text))
+        if kind == "final":
+            finals.set()
+
+    rt = RealtimeTranscriber(mic, "mock", on_event, url=server.realtime_url, chunk_ms=20)
+    rt.start()
+    try:
+        t = np.arange(sr) / sr
+        speech = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+        for block in np.array_split(np.concatenate([speech, np.zeros(sr, dtype=np.int16)]), 40):
+            mic._ring.write(block)
+            time.sleep(0.01)
+        assert finals.wait(5), events
+    finally:
+        rt.stop()
+        server.stop()
+    partials = [text for kind, text in events if kind == "partial"]
+    assert ("final", QUESTIONS[0]) in events
+    assert partials and partials[-1] == QUESTIONS[0]
+    assert server.counts.get("realtime_turns") == 1
+
+
+def test_reconnects_with_backoff_when_the_server_hangs_up():
+    import asyncio
+
+    import websockets
+
+    accepted = []
+    loop = asyncio.new_event_loop()
+
+    async def hang_up(ws, *args):
+        accepted.append(time.monotonic())
+        await ws.close()
+
+    async def listen():
+        return await websockets.serve(hang_up, "127.0.0.1", 0)
+
+    server = loop.run_until_complete(listen())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = next(iter(server.sockets)).getsockname()[1]
+    events = []
+    rt = RealtimeTranscriber(
+        RollingMic(), "mock", lambda kind, text: events.append((kind, text)), url=f"ws://127.0.0.1:{port}"
+    )
+    rt.start()
+    time.sleep(1.2)
+    rt.stop()
+    rt._thread.join(5)
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    # 0.5 s then 1 s between attempts, and the thread is still alive to retry
+    assert 2 <= len(accepted) <= 3
+    assert any(kind == "status" and "reconnecting" in text for kind, text in events)
+    assert not rt._thread.is_alive()
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from interview_copilot.asr import make_backend
+from interview_copilot.audio import synthetic_speech
+from interview_copilot.config import AppConfig
+from interview_copilot.mock_server import MockOpenAIServer, MockSettings
+from interview_copilot.openai_client import make_client
+from interview_copilot.scheduler import MANUAL, ROLLING, RateLimited, RequestScheduler, parse_rate_limits
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("gpt-4o-mini=500/200000, whisper-1=50, bad,") == {
+        "gpt-4o-mini": (500.0, 200000.0),
+        "whisper-1": (50.0, 0.0),
+    }
+
+
+def test_rolling_leaves_the_reserve_to_manual_requests():
+    scheduler = RequestScheduler({"m": (4, 0)}, reserve=0.5, rolling_max_wait=0.1)
+    scheduler.acquire("m", priority=ROLLING)
+    scheduler.acquire("m", priority=ROLLING)
+    t0 = time.monotonic()
+    with pytest.raises(RateLimited):
+        scheduler.acquire("m", priority=ROLLING)
+    assert time.monotonic() - t0 < 0.05
+    assert scheduler.dropped == 1
+    # The reserved half is still there for the user
+    scheduler.acquire("m", priority=MANUAL)
+    scheduler.acquire("m", priority=MANUAL)
+    # Models without limits are never delayed
+    scheduler.acquire("other", 10**6, ROLLING)
+
+
+def test_token_budget_counts_request_size():
+    scheduler = RequestScheduler({"m": (0, 1000)}, reserve=0.0, rolling_max_wait=0.0)
+    scheduler.acquire("m", 900, ROLLING)
+    with pytest.raises(RateLimited):
+        scheduler.acquire("m", 200, ROLLING)
+    scheduler.acquire("m", 100, ROLLING)
+
+
+def test_transcription_requests_share_the_budget_against_the_mock():
+    server = MockOpenAIServer(MockSettings(transcribe_ms=5, jitter=0)).start()
+    try:
+        cfg = AppConfig(openai_api_key="mock", openai_base_url=server.base_url)
+        scheduler = RequestScheduler(parse_rate_limits(f"{cfg.transcribe_model}=2"), reserve=0.5, rolling_max_wait=0.1)
+        asr = make_backend(cfg, make_client("mock", base_url=server.base_url), scheduler)
+        clip = synthetic_speech(1.0, 16000)
+        assert asr.transcribe(clip, 16000, ROLLING)
+        # Rolling work is refused locally and never reaches the server
+        with pytest.raises(RateLimited):
+            asr.transcribe(clip, 16000, ROLLING)
+        assert asr.transcribe(clip, 16000, MANUAL)
+        asr.close()
+    finally:
+        server.stop()
+    assert server.counts["transcriptions"] == 2
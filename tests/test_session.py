@@ -0,0 +1,73 @@
+import queue
+import time
+
+from interview_copilot.archive import SessionArchive
+from interview_copilot.audio import CaptureEngine, synthetic_speech
+from interview_copilot.config import AppConfig
+from interview_copilot.mock_server import MockOpenAIServer, MockSettings
+from interview_copilot.openai_client import make_client
+from interview_copilot.session import CopilotSession
+
+
+def _drain_until(events: queue.Queue, kind: str, timeout: float = 10.0) -> list[tuple[str, object]]:
+    seen = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            item = events.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        seen.append(item)
+        if item[0] == kind:
+            break
+    return seen
+
+
+def test_session_runs_the_capture_path_without_a_window():
+    server = MockOpenAIServer(MockSettings(transcribe_ms=5, ttft_ms=5, token_ms=1, jitter=0)).start()
+    cfg = AppConfig(openai_api_key="mock", openai_base_url=server.base_url)
+    cfg.transcribe_backend = "openai"
+    cfg.context_turns = 0
+    session = CopilotSession(cfg, make_client("mock", base_url=server.base_url))
+    try:
+        session.start_asr()
+        session.start_pipeline()
+        clip = synthetic_speech(1.0, cfg.sample_rate)
+        session.jobs.submit(lambda t: session.run_audio_job(t, clip), "test")
+        kinds = [k for k, _ in _drain_until(session.events, "suggestions")]
+        # Repeating the clip is answered from the transcript cache
+        session.jobs.submit(lambda t: session.run_audio_job(t, clip), "test")
+        _drain_until(session.events, "suggestions")
+    finally:
+        session.close()
+        server.stop()
+    assert kinds.index("transcript") < kinds.index("suggestions")
+    assert session.transcript_cache.stats.hits == 1
+    assert server.counts["transcriptions"] == 1
+
+
+
+class _SwitchableSession(CopilotSession):
+    def __init__(self, cfg, engine):
+        super().__init__(cfg, None)
+        self.engine = engine
+
+    def interviewer_engine(self):
+        return self.engine
+
+
+def test_loopback_change_moves_rolling_and_archive_to_the_new_source(tmp_path):
+    cfg = AppConfig(openai_api_key="mock", rolling_mode="window", context_turns=0, archive_dir=str(tmp_path))
+    old, new = CaptureEngine(samplerate=cfg.sample_rate), CaptureEngine(samplerate=cfg.sample_rate)
+    session = _SwitchableSession(cfg, old)
+    session.start_pipeline()
+    session.archive = SessionArchive(old, tmp_path)
+    session.archive.start()
+    try:
+        assert session.start_rolling()
+        session.engine = new
+        session.apply_loopback()
+        assert session.rolling_mic is new
+        assert session.archive.source is new
+    finally:
+        session.close()
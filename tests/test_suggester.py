@@ -0,0 +1,78 @@
+import threading
+
+from interview_copilot.suggester import ConversationMemory
+from interview_copilot.tokens import count_tokens
+
+TURNS = [
+    "Tell me about yourself and the kind of teams you like to work in.",
+    "What was the hardest production incident you handled, and what changed afterwards?",
+    "How would you design a rate limiter for a public API with bursty clients?",
+    "Why are you leaving your current role?",
+]
+
+
+def _memory(max_tokens: int) -> ConversationMemory:
+    memory = ConversationMemory(None, keep_turns=4, max_tokens=max_tokens)
+    for turn in TURNS:
+        memory.add(turn)
+    return memory
+
+
+def test_context_never_exceeds_max_tokens():
+    for limit in range(0, 120):
+        memory = _memory(limit)
+        memory.summary = "The candidate has described " + "several backend projects and their trade-offs " * 20
+        text = memory.context()
+        assert count_tokens(text) <= limit, limit
+        memory.close()
+
+
+def test_context_at_the_limit_keeps_the_newest_turns():
+    full = _memory(10_000).context()
+    memory = _memory(count_tokens(full))
+    assert memory.context() == full
+    memory.max_tokens -= 1
+    trimmed = memory.context()
+    assert count_tokens(trimmed) < count_tokens(full)
+    assert trimmed.endswith(TURNS[-1])
+    assert TURNS[0] not in trimmed
+
+
+def test_context_skips_the_turn_being_answered():
+    memory = _memory(600)
+    assert TURNS[-1] not in memory.context("why are you leaving your current role")
+    # A shorter turn that merely appears inside the question stays
+    memory.add("current role")
+    assert "- current role" in memory.context(TURNS[-1])
+
+
+def test_older_turns_are_folded_into_the_summary():
+    folded = threading.Event()
+
+    def summarize(summary, turns):
+        folded.set()
+        return (summary + " " + " / ".join(turns)).strip()
+
+    memory = ConversationMemory(summarize, keep_turns=2, max_tokens=600)
+    for turn in TURNS:
+        memory.add(turn)
+    assert folded.wait(5)
+    memory._executor.shutdown(wait=True)
+    assert TURNS[0] in memory.summary and TURNS[1] in memory.summary
+    text = memory.context()
+    assert text.startswith("Summary: ")
+    assert text.endswith(f"- {TURNS[2]}\n- {TURNS[3]}")
+    memory.clear()
+    assert memory.context() == ""
+
+
+def test_failed_summaries_keep_the_turns():
+    def summarize(summary, turns):
+        raise RuntimeError("offline")
+
+    memory = ConversationMemory(summarize, keep_turns=1, max_tokens=600)
+    memory.add(TURNS[0])
+    memory.add(TURNS[1])
+    memory._executor.shutdown(wait=True)
+    assert memory.summary == ""
+    assert memory.context() == f"- {TURNS[0]}\n- {TURNS[1]}"
@@ -0,0 +1,33 @@
+from interview_copilot.transcript import TranscriptStitcher, Word, normalize_text
+
+
+def _words(text: str, start: float, step: float = 0.5) -> list[Word]:
+    return [Word(w, start + i * step, start + i * step + 0.4) for i, w in enumerate(text.split())]
+
+
+def test_overlapping_chunks_are_stitched_without_repeats():
+    st = TranscriptStitcher(stable_margin=1.0)
+    new = st.add_chunk(_words("tell me about a time you", 0.0), 3.0)
+    assert [w.text for w in new] == ["tell", "me", "about", "a"]
+    assert st.committed_until == 1.9
+    assert st.text() == "tell me about a time you"
+    # The next chunk re-hears the overlap with slightly different timestamps
+    st.add_chunk(_words("A time you disagreed with your manager", 1.45), 6.0)
+    assert st.text() == "tell me about a time you disagreed with your manager"
+
+
+def test_advance_skips_silence_and_drops_stale_tentative_words():
+    st = TranscriptStitcher()
+    st.add_chunk(_words("so", 0.0), 0.5)
+    assert st.committed == [] and st.text() == "so"
+    st.advance(2.0)
+    assert st.committed_until == 2.0
+    assert st.text() == ""
+    st.add_chunk(_words("why this company", 2.5), 6.0)
+    assert st.text_since(2.9) == "this company"
+
+
+def test_normalize_text_ignores_case_spacing_and_punctuation():
+    assert normalize_text("  Tell me,  about  YOURSELF?") == "tell me about yourself"
+    assert normalize_text("Don't stop.") == "don't stop"
+    assert normalize_text("...") == ""
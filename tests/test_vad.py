@@ -0,0 +1,46 @@
+import numpy as np
+
+from interview_copilot.audio import synthetic_speech
+from interview_copilot.vad import Endpointer, VoiceActivityDetector
+
+SR = 16000
+
+
+def _silence(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    return (rng.standard_normal((int(seconds * SR), 1)) * 3).astype(np.int16)
+
+
+def _feed(endpointer: Endpointer, data: np.ndarray, step: int = SR // 2):
+    found, pos = [], 0
+    while pos < len(data):
+        found += endpointer.process(data[pos : pos + step], pos)
+        if endpointer.position == pos:
+            break
+        pos = endpointer.position
+    return found
+
+
+def test_endpointer_finds_each_utterance():
+    data = np.concatenate(
+        [_silence(1), synthetic_speech(1.5, SR), _silence(1.5), synthetic_speech(1, SR, seed=2), _silence(1.5)]
+    )
+    endpointer = Endpointer(VoiceActivityDetector(SR), hangover_ms=500, preroll_ms=200)
+    found = _feed(endpointer, data)
+    assert len(found) == 2
+    first, second = found
+    # Starts include the pre-roll; ends stop at the last speech frame
+    assert 0.7 * SR <= first.start <= 1.0 * SR
+    assert 2.2 * SR <= first.end <= 2.6 * SR
+    assert 3.7 * SR <= second.start <= 4.0 * SR
+    assert not endpointer.in_speech and endpointer.flush() is None
+
+
+def test_endpointer_cuts_long_speech_and_flushes_the_rest():
+    vad = VoiceActivityDetector(SR)
+    endpointer = Endpointer(vad, max_utterance_seconds=2.0)
+    found = _feed(endpointer, np.concatenate([_silence(0.5), synthetic_speech(5, SR)]))
+    # Cuts land on the first frame boundary past the limit
+    assert len(found) == 2 and all(u.end - u.start <= 2.0 * SR + vad.frame_len for u in found)
+    last = endpointer.flush()
+    assert last is not None and last.start == found[-1].end